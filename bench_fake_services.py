@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+import os
+import sys
+import time
+import socket
+import argparse
+import threading
+
+# === Import fake_services from the bundled hub ===
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT_DIR, "ccri_ctf.pyz"))
+import fake_services
+
+# Benchmarks run on shifted ports so they don't collide with a running hub
+PORT_SHIFT = 20000
+REQUEST = b"GET / HTTP/1.1\r\nHost: localhost\r\nUser-Agent: bench\r\n\r\n"
+
+
+def shifted_maps():
+    responses = {p + PORT_SHIFT: v for p, v in fake_services.GUIDED_ALL_PORTS.items()}
+    services = {p + PORT_SHIFT: v for p, v in fake_services.GUIDED_SERVICE_NAMES.items()}
+    return responses, services
+
+
+def read_response(sock, buf=b""):
+    """Reads one HTTP response. Returns (response, leftover, keep_alive)."""
+    while b"\r\n\r\n" not in buf:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return buf, b"", False
+        buf += chunk
+    head, rest = buf.split(b"\r\n\r\n", 1)
+    length = None
+    keep_alive = True
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name == b"content-length":
+            length = int(value)
+        elif name == b"connection" and value.strip().lower() == b"close":
+            keep_alive = False
+    if length is None:
+        # No Content-Length: the body runs until the server closes
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            rest += chunk
+        return head + rest, b"", False
+    while len(rest) < length:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        rest += chunk
+    return head + rest[:length], rest[length:], keep_alive and head.startswith(b"HTTP/1.1")
+
+
+def client_new_connections(port, count):
+    for _ in range(count):
+        with socket.create_connection(("127.0.0.1", port)) as s:
+            s.sendall(REQUEST)
+            read_response(s)
+
+
+def client_keep_alive(port, count):
+    s = socket.create_connection(("127.0.0.1", port))
+    leftover = b""
+    for _ in range(count):
+        s.sendall(REQUEST)
+        _, leftover, keep_alive = read_response(s, leftover)
+        if not keep_alive:
+            s.close()
+            s = socket.create_connection(("127.0.0.1", port))
+            leftover = b""
+    s.close()
+
+
+def run_clients(ports, client, requests, concurrency):
+    per_thread = max(1, requests // concurrency)
+    threads = [
+        threading.Thread(target=client, args=(port, per_thread))
+        for port in ports for _ in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return per_thread * concurrency / elapsed
+
+
+def supports_keep_alive(port):
+    with socket.create_connection(("127.0.0.1", port)) as s:
+        s.sendall(REQUEST)
+        _, _, keep_alive = read_response(s)
+    return keep_alive
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Requests/sec per port for the simulated Nmap services")
+    parser.add_argument("--requests", type=int, default=400, help="Requests per port per scenario")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent clients per port")
+    parser.add_argument("--ports", type=int, default=5, help="How many simulated ports to hit at once")
+    args = parser.parse_args()
+
+    responses, services = shifted_maps()
+    ports = sorted(responses)[:args.ports]
+    results = []
+
+    # 1) One HTTPServer thread per port (the original design)
+    servers = []
+    for port in ports:
+        server = fake_services.HTTPServer(("127.0.0.1", port),
+                                          fake_services.PortHandlerFactory(responses, services))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    results.append(("HTTPServer per port, new connection",
+                    run_clients(ports, client_new_connections, args.requests, args.concurrency)))
+    if supports_keep_alive(ports[0]):
+        results.append(("HTTPServer per port, keep-alive",
+                        run_clients(ports, client_keep_alive, args.requests, args.concurrency)))
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+    # 2) PortFarm: every port on one selector thread
+    farm = fake_services.PortFarm(host="127.0.0.1")
+    for port in ports:
+        farm.add_port(port, responses, services)
+    farm.start()
+    results.append(("PortFarm, new connection",
+                    run_clients(ports, client_new_connections, args.requests, args.concurrency)))
+    if supports_keep_alive(ports[0]):
+        results.append(("PortFarm, keep-alive",
+                        run_clients(ports, client_keep_alive, args.requests, args.concurrency)))
+    farm.stop()
+
+    print(f"\n📊 {len(ports)} ports x {args.concurrency} clients, {args.requests} requests per port\n")
+    for name, rate in results:
+        print(f"   {name:<40} {rate:>9.0f} req/s per port")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@ import sys
 
 # === Import Core ===
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
-from exploration_core import Colors, header, pause, require_input, spinner, print_success, print_error, print_info
+from exploration_core import Colors, header, pause, require_input, Spinner, print_success, print_error, print_info
 
 # === Config ===
 IMAGE_FILE = "squirrel.jpg"
@@ -74,9 +74,10 @@ def main():
             break
 
         print(f"\n🔓 Attempting unlock with: {Colors.BOLD}{pw}{Colors.END}")
-        spinner("Running steghide")
+        with Spinner("Running steghide"):
+            unlocked = run_steghide(pw, image_path, output_path)
 
-        if run_steghide(pw, image_path, output_path):
+        if unlocked:
             print("\n" + "=" * 50)
             print_success("ACCESS GRANTED! Message recovered:")
             print("=" * 50)
@@ -5,7 +5,7 @@ import sys
 
 # === Import Core ===
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
-from exploration_core import Colors, header, pause, require_input, spinner, print_success, print_error, print_info
+from exploration_core import Colors, header, pause, require_input, Spinner, print_success, print_error, print_info
 
 # === Config ===
 INPUT_FILE = "encoded.txt"
@@ -55,19 +55,20 @@ def main():
     output_path = get_path(OUTPUT_FILE)
     
     print(f"Let's check if the file matches the Base64 signature described in the intel.\n")
-    spinner("Reading file")
+    try:
+        with Spinner("Reading file"), open(input_path, "r", errors="replace") as f:
+            content = f.read().strip()
+    except FileNotFoundError:
+        content = None
     print("\n")
 
     print(f"📄 Content of {INPUT_FILE}:")
     print("-" * 50)
-    try:
-        with open(input_path, "r", errors="replace") as f:
-            content = f.read().strip()
-            print(f"{Colors.YELLOW}{content}{Colors.END}")
-    except FileNotFoundError:
+    if content is None:
         print_error(f"{INPUT_FILE} not found!")
         pause()
         return
+    print(f"{Colors.YELLOW}{content}{Colors.END}")
     print("-" * 50 + "\n")
     
     if content.endswith("="):
@@ -94,9 +95,8 @@ def main():
 
     # 4. Execution
     print("\n⏳ Decoding transmission...")
-    spinner("Processing")
-
-    decoded = decode_base64(input_path, output_path)
+    with Spinner("Processing"):
+        decoded = decode_base64(input_path, output_path)
 
     if not decoded:
         print("\n")
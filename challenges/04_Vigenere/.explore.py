@@ -5,7 +5,7 @@ import re
 
 # === Import Core ===
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
-from exploration_core import Colors, header, pause, require_input, spinner, print_success, print_error, print_info, resize_terminal, clear_screen
+from exploration_core import Colors, header, pause, require_input, Spinner, print_success, print_error, print_info, resize_terminal, clear_screen
 
 # === Config ===
 CIPHER_FILE = "cipher.txt"
@@ -103,10 +103,9 @@ def main():
             continue
 
         print(f"\n⏳ Running decryption algorithm with key: '{Colors.BOLD}{key}{Colors.END}'")
-        spinner("Processing")
-
-        plaintext = vigenere_decrypt(ciphertext, key)
-        flag = find_flag(plaintext)
+        with Spinner("Processing"):
+            plaintext = vigenere_decrypt(ciphertext, key)
+            flag = find_flag(plaintext)
 
         # Show Results
         clear_screen()
@@ -7,6 +7,7 @@ import time
 # Add root to path to find coach_core
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 from coach_core import Coach
+from cracking_core import ZipCracker
 
 # === THE EPHEMERAL TOOL CODE ===
 TOOL_NAME = "cracker.py"
@@ -89,13 +90,8 @@ def determine_correct_password():
     if not os.path.exists(zip_file) or not os.path.exists(wordlist):
         return "unknown"
     try:
-        with open(wordlist, "r", errors="ignore") as f:
-            for line in f:
-                password = line.strip()
-                if not password: continue
-                res = subprocess.call(["unzip", "-P", password, "-tq", zip_file],
-                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                if res == 0: return password
+        password = ZipCracker(zip_file).crack(wordlist)[0]
+        if password is not None: return password
     except:
         pass
     return "unknown" 
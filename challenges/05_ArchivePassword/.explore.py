@@ -6,7 +6,8 @@ import time
 
 # === Import Core ===
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
-from exploration_core import Colors, header, pause, require_input, spinner, print_success, print_error, print_info, resize_terminal, clear_screen
+from exploration_core import Colors, header, pause, require_input, Spinner, print_success, print_error, print_info, resize_terminal, clear_screen
+from cracking_core import ZipCracker
 
 # === Config ===
 ZIP_FILE = "secret.zip"
@@ -78,33 +79,22 @@ def main():
     print("⏳ Starting engine...\n")
     progress_bar(length=20, delay=0.04)
 
-    found = False
-    password = None
-
-    with open(wordlist_path, "r", encoding="utf-8", errors="replace") as f:
-        for line in f:
-            pw = line.strip()
-            if not pw: continue
-            
-            # Simulated cracking output - Overwrite line for speed effect
-            print(f"\r[🔐] Testing: {Colors.YELLOW}{pw:<20}{Colors.END}", end="", flush=True)
-            time.sleep(0.01) # Slightly faster to look cool
-
-            # The actual check
-            result = subprocess.run(
-                ["unzip", "-P", pw, "-t", zip_path],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-
-            if "OK" in result.stdout:
-                print(f"\n\n{Colors.GREEN}✅ MATCH FOUND: {Colors.BOLD}{pw}{Colors.END}")
-                password = pw
-                found = True
-                break
-
-    if not found:
+    # The archive is opened once; candidates are checked in-process (see cracking_core)
+    def show_candidate(tested, pw):
+        print(f"\r[🔐] Testing: {Colors.YELLOW}{pw[:20]:<20}{Colors.END}  ({tested:,} tried)", end="", flush=True)
+
+    try:
+        password, tested, seconds = ZipCracker(zip_path).crack(wordlist_path, on_progress=show_candidate)
+    except (ValueError, OSError) as e:
+        print()
+        print_error(f"Could not attack the archive: {e}")
+        pause("Press ENTER to close this terminal...")
+        sys.exit(1)
+
+    if password is not None:
+        print(f"\n\n{Colors.GREEN}✅ MATCH FOUND: {Colors.BOLD}{password}{Colors.END}")
+        print(f"   ({tested:,} candidates in {seconds:.2f}s)")
+    else:
         print("\n")
         print_error("Password not found in wordlist.")
         pause("Press ENTER to close this terminal...")
@@ -123,10 +113,9 @@ def main():
             print(f"{Colors.RED}   ❌ Please type 'yes' or 'no'.{Colors.END}")
 
     print("\n📦 Extracting archive contents...\n")
-    spinner("Extracting files")
-
-    subprocess.run(["unzip", "-o", "-P", password, zip_path, "-d", script_dir],
-                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    with Spinner("Extracting files"):
+        subprocess.run(["unzip", "-o", "-P", password, zip_path, "-d", script_dir],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
 
     if not os.path.isfile(b64_path):
         print_error("Extraction failed — missing Base64 message.")
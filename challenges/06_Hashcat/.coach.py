@@ -6,12 +6,13 @@ import subprocess
 # Add root to path to find coach_core
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 from coach_core import Coach
+from cracking_core import load_hashes, crack_md5
 
 # === THE EPHEMERAL ASSEMBLER TOOL ===
 TOOL_NAME = ".assembler.py"
 ASSEMBLER_SCRIPT_CONTENT = r"""#!/usr/bin/env python3
+import base64
 import os
-import subprocess
 import sys
 
 def main():
@@ -24,9 +25,9 @@ def main():
             print(f"ERROR: Could not find '{p}'. Did you unzip the segments?", file=sys.stderr)
             sys.exit(1)
         
-        # Decode using base64 command
-        res = subprocess.run(["base64", "-d", p], capture_output=True, text=True)
-        decoded_lines.append(res.stdout.splitlines())
+        # Decode Base64 (same as `base64 -d FILE`)
+        with open(p, "rb") as f:
+            decoded_lines.append(base64.b64decode(f.read().strip()).decode("utf-8").splitlines())
 
     # 2. Merge (Zip) them together
     print("--- REASSEMBLED FLAGS ---")
@@ -82,6 +83,14 @@ def get_ordered_passwords():
                     h, p = line.strip().split(":", 1)
                     cracked[h] = p
     
+    # Anything the student's hashcat run didn't produce (e.g. hashcat isn't installed)
+    # is recovered with the built-in MD5 engine so the unzip steps can still be checked
+    if os.path.exists(hashes_file) and os.path.exists("wordlist.txt"):
+        missing = [h for h in load_hashes(hashes_file) if h not in cracked]
+        if missing:
+            found, _, _ = crack_md5(missing, "wordlist.txt")
+            cracked.update({h: pw.decode("utf-8", "replace") for h, pw in found.items()})
+
     # Retrieve in strict input order
     if os.path.exists(hashes_file):
         with open(hashes_file, "r") as f:
@@ -2,13 +2,13 @@
 import os
 import sys
 import subprocess
-import shutil
-import base64
 import time
+import tempfile
 
 # === Import Core ===
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
-from exploration_core import Colors, header, pause, require_input, spinner, print_success, print_error, print_info, resize_terminal, clear_screen
+from exploration_core import Colors, header, pause, require_input, Spinner, print_success, print_error, print_info, resize_terminal, clear_screen
+from cracking_core import choose_md5_backend, crack_md5_to_potfile, unlock_segments, decode_segment, assemble_columns
 
 # === Config ===
 HASHES_FILE = "hashes.txt"
@@ -16,6 +16,9 @@ WORDLIST_FILE = "wordlist.txt"
 POTFILE = "hashcat.potfile"
 SEGMENTS_DIR = "segments"
 ASSEMBLED_FILE = "flag.txt"
+# Set CCRI_MATERIALIZE=1 to also extract encoded_segments*.txt into the current folder,
+# the way `unzip` would, so they can be inspected by hand afterwards
+MATERIALIZE = os.environ.get("CCRI_MATERIALIZE", "") not in ("", "0")
 
 def get_path(filename):
     return os.path.join(os.path.dirname(__file__), filename)
@@ -31,43 +34,47 @@ def run_hashcat(hashes_file, wordlist_file, potfile):
         stderr=subprocess.DEVNULL
     )
 
-def internal_assembly_logic():
+def crack_hashes(hashes_file, wordlist_file, potfile):
     """
-    Reads the extracted files, decodes them, and merges them in memory.
-    Returns a list of assembled flag strings.
+    Fills the potfile using hashcat, or the built-in MD5 engine when hashcat is missing
+    or would spend longer starting up than the job takes (CCRI_HASH_BACKEND overrides).
     """
-    parts = ["encoded_segments1.txt", "encoded_segments2.txt", "encoded_segments3.txt"]
-    decoded_columns = []
+    backend = choose_md5_backend(wordlist_file)
+    label = "Running Hashcat" if backend == "hashcat" else "Cracking MD5 (built-in engine)"
+    with Spinner(label) as spin:
+        if backend == "hashcat":
+            run_hashcat(hashes_file, wordlist_file, potfile)
+        else:
+            crack_md5_to_potfile(hashes_file, wordlist_file, potfile,
+                                 on_progress=lambda tested, word: spin.update(f"{tested:,} words"))
+    return backend
 
-    # 1. Read and Decode each part
-    for p in parts:
-        if not os.path.exists(p):
-            return []
-        
-        try:
-            with open(p, "rb") as f:
-                raw_data = f.read().strip()
-            # Decode Base64 in memory
-            decoded_text = base64.b64decode(raw_data).decode('utf-8')
-            decoded_columns.append(decoded_text.splitlines())
-        except Exception:
-            return []
-
-    # 2. Stitch columns together
-    results = []
-    if decoded_columns:
-        # Assuming all columns have the same number of lines
-        num_rows = len(decoded_columns[0])
-        for i in range(num_rows):
-            row_pieces = []
-            for col in decoded_columns:
-                if i < len(col):
-                    row_pieces.append(col[i].strip())
-                else:
-                    row_pieces.append("???")
-            results.append("-".join(row_pieces))
-            
-    return results
+def internal_assembly_logic(zip_paths, passwords, materialize_dir=None):
+    """
+    Unlocks each segment in memory, decodes it, and merges the columns.
+    Returns (list of assembled flag strings, [(zip_path, unlocked?)]).
+    """
+    decoded_columns = []
+    unlocked = []
+
+    # 1. Unlock and Decode each part (nothing is extracted unless materialize_dir is set)
+    for zip_path, member, data in unlock_segments(zip_paths, passwords, materialize_dir):
+        column = decode_segment(data) if data is not None else None
+        unlocked.append((zip_path, column is not None))
+        if column is not None:
+            decoded_columns.append(column)
+
+    # 2. Stitch columns together (missing rows become "???")
+    if len(decoded_columns) != len(zip_paths):
+        return [], unlocked
+    return assemble_columns(decoded_columns), unlocked
+
+def writable_path(filename):
+    """The challenge folder if we may write there, otherwise the temp directory."""
+    folder = os.path.dirname(os.path.abspath(__file__))
+    if not os.access(folder, os.W_OK):
+        folder = tempfile.gettempdir()
+    return os.path.join(folder, filename)
 
 def main():
     # 1. Setup
@@ -75,7 +82,7 @@ def main():
     
     hashes_path = get_path(HASHES_FILE)
     wordlist_path = get_path(WORDLIST_FILE)
-    potfile_path = get_path(POTFILE)
+    potfile_path = writable_path(POTFILE)
     segments_path = get_path(SEGMENTS_DIR)
 
     # 2. Mission Briefing
@@ -102,14 +109,16 @@ def main():
     header("🛠️ Behind the Scenes")
     print("This script simulates a complex automation pipeline:\n")
     
-    print("1. **Crack**: It calls `hashcat` to recover the passwords from MD5 hashes.")
-    print("2. **Unlock**: It uses those passwords to `unzip` the archive segments.")
-    print("3. **Assemble**: It runs an internal algorithm to stitching the files.")
+    print("1. **Crack**: It calls `hashcat` to recover the passwords from MD5 hashes")
+    print("   (or a built-in MD5 engine that writes the same potfile when hashcat isn't worth starting).")
+    print("2. **Unlock**: It uses those passwords to open the archive segments (like `unzip -P`).")
+    print("3. **Assemble**: It runs an internal algorithm to stitch the fragments together.")
     
     print(f"\n{Colors.CYAN}🧩 The Assembly Logic:{Colors.END}")
     print("   The zips contain fragments of data. Manually pasting them together is slow.")
-    print("   This script will load all three text files into memory, decode them from")
-    print("   Base64, and align them line-by-line to reconstruct the flag.\n")
+    print("   This script reads all three fragments straight out of the zips into memory,")
+    print("   decodes them from Base64, and aligns them line-by-line to reconstruct the flag.")
+    print("   (Nothing is extracted to disk unless CCRI_MATERIALIZE=1 is set.)\n")
     
     require_input("Type 'start' to begin the chain reaction: ", "start")
 
@@ -118,8 +127,7 @@ def main():
     if os.path.exists(potfile_path): os.remove(potfile_path)
     
     print(f"\n{Colors.CYAN}🔨 [Phase 1] Cracking Hashes...{Colors.END}")
-    spinner("Running Hashcat")
-    run_hashcat(hashes_path, wordlist_path, potfile_path)
+    crack_hashes(hashes_path, wordlist_path, potfile_path)
 
     # Map hashes to passwords
     cracked_map = {}
@@ -130,7 +138,7 @@ def main():
                     h, p = line.strip().split(":", 1)
                     cracked_map[h] = p
     else:
-        print_error("Hashcat failed to create a potfile.")
+        print_error("Cracking failed to create a potfile.")
         sys.exit(1)
 
     # Get ordered passwords based on hashes.txt
@@ -146,55 +154,51 @@ def main():
     
     time.sleep(1)
 
-    # 5. Execution Phase - Step 2: Unlock
+    # 5. Execution Phase - Step 2: Unlock (in memory)
     print(f"\n{Colors.CYAN}🔓 [Phase 2] Unlocking Archives...{Colors.END}")
-    
-    # Clean up old extraction
-    for f in os.listdir("."):
-        if f.startswith("encoded_segments"):
-            os.remove(f)
-
-    for i, pw in enumerate(ordered_passwords):
+    zip_paths = [os.path.join(segments_path, f"part{i+1}.zip") for i in range(len(ordered_passwords))]
+    materialize_dir = None
+    if MATERIALIZE:
+        # Clean up old extraction
+        for f in os.listdir("."):
+            if f.startswith("encoded_segments"):
+                os.remove(f)
+        materialize_dir = "."
+
+    with Spinner("Unlocking and decoding in memory"):
+        candidate_flags, unlocked = internal_assembly_logic(zip_paths, ordered_passwords, materialize_dir)
+
+    for (zip_file, ok), pw in zip(unlocked, ordered_passwords):
         if not pw:
-            print_error(f"   Skipping Part {i+1} (Password unknown)")
+            print_error(f"   Skipping {os.path.basename(zip_file)} (Password unknown)")
             continue
-            
-        zip_file = os.path.join(segments_path, f"part{i+1}.zip")
-        print(f"   Unzipping {os.path.basename(zip_file)} with '{pw}'...", end="")
-        
-        res = subprocess.run(
-            ["unzip", "-o", "-P", pw, zip_file],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL
-        )
-        if res.returncode == 0:
-            print(f" {Colors.GREEN}OK{Colors.END}")
-        else:
-            print(f" {Colors.RED}FAILED{Colors.END}")
+        print(f"   Unlocking {os.path.basename(zip_file)} with '{pw}'...", end="")
+        print(f" {Colors.GREEN}OK{Colors.END}" if ok else f" {Colors.RED}FAILED{Colors.END}")
+    if materialize_dir:
+        print_info("Extracted copies written as encoded_segments*.txt")
             
     time.sleep(1)
 
     # 6. Execution Phase - Step 3: Assemble (Internal)
     print(f"\n{Colors.CYAN}🧩 [Phase 3] Assembling Fragments (Internal Logic)...{Colors.END}")
-    spinner("Processing in memory")
-    
-    candidate_flags = internal_assembly_logic()
     
     if not candidate_flags:
         print_error("Assembly failed. Are the ZIP files empty?")
     else:
-        # Save to file
-        with open(ASSEMBLED_FILE, "w") as f:
-            for flag in candidate_flags:
-                f.write(flag + "\n")
-            
         print_success("Assembly complete.")
         print("-" * 40)
         for flag in candidate_flags:
             print(f"{Colors.BOLD}{flag}{Colors.END}")
         print("-" * 40 + "\n")
-        
-        print(f"✅ Flags saved to: {Colors.BOLD}{ASSEMBLED_FILE}{Colors.END}")
+
+        # Save to file (optional: the flags are already on screen)
+        try:
+            with open(ASSEMBLED_FILE, "w") as f:
+                for flag in candidate_flags:
+                    f.write(flag + "\n")
+            print(f"✅ Flags saved to: {Colors.BOLD}{ASSEMBLED_FILE}{Colors.END}")
+        except OSError as e:
+            print_info(f"Could not save {ASSEMBLED_FILE} ({e.strerror}); copy the flag from above.")
         print(f"{Colors.CYAN}🧠 Hint: Look for the one matching CCRI-AAAA-1111.{Colors.END}")
 
     pause("\n🎉 Press ENTER to exit...")
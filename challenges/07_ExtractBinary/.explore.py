@@ -7,7 +7,7 @@ import re
 
 # === Import Core ===
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
-from exploration_core import Colors, header, pause, require_input, spinner, print_success, print_error, print_info, resize_terminal, clear_screen
+from exploration_core import Colors, header, pause, require_input, Spinner, print_success, print_error, print_info, resize_terminal, clear_screen
 
 # === Config ===
 BINARY_FILE = "hidden_flag"
@@ -78,9 +78,8 @@ def main():
     require_input("Type 'run' when you're ready to extract strings from the binary: ", "run")
 
     print(f"\n🔍 Running: strings \"{BINARY_FILE}\" > \"{STRINGS_FILE}\"")
-    spinner("Extracting strings")
-    run_strings(binary_path, strings_path)
-    time.sleep(0.3)
+    with Spinner("Extracting strings"):
+        run_strings(binary_path, strings_path)
     print_success(f"All extracted strings saved to: {STRINGS_FILE}\n")
 
     print(f"📄 Previewing the first 15 lines of extracted text:")
@@ -7,7 +7,7 @@ import re
 
 # === Import Core ===
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
-from exploration_core import Colors, header, pause, require_input, spinner, print_success, print_error, print_info, resize_terminal, clear_screen
+from exploration_core import Colors, header, pause, require_input, Spinner, print_success, print_error, print_info, resize_terminal, clear_screen
 
 # === Config ===
 LOG_FILE = "auth.log"
@@ -99,10 +99,9 @@ def main():
     require_input("Type 'run' to execute the filter: ", "run")
 
     print(f"\n⏳ Scanning {LOG_FILE}...")
-    spinner("Filtering noise")
-
     # Perform the scan
-    matches = scan_for_flags(log_path, REGEX_PATTERN)
+    with Spinner("Filtering noise"):
+        matches = scan_for_flags(log_path, REGEX_PATTERN)
 
     if matches:
         # Save results
@@ -7,7 +7,7 @@ import re
 
 # === Import Core ===
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
-from exploration_core import Colors, header, pause, require_input, spinner, print_success, print_error, print_info, resize_terminal, clear_screen
+from exploration_core import Colors, header, pause, require_input, Spinner, print_success, print_error, print_info, resize_terminal, clear_screen
 
 # === Config ===
 SCRIPT_NAME = "broken_flag.py"
@@ -138,8 +138,8 @@ def main():
             
         if op in ["+", "-", "*", "/"]:
             print(f"\n✏️ Patching {SCRIPT_NAME} with operator '{op}'...")
-            patch_operator_in_script(broken_script, op)
-            spinner("Updating code")
+            with Spinner("Updating code"):
+                patch_operator_in_script(broken_script, op)
         else:
             print(f"{Colors.RED}❌ Invalid operator.{Colors.END}")
             time.sleep(1)
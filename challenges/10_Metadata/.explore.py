@@ -8,7 +8,7 @@ import re
 
 # === Import Core ===
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
-from exploration_core import Colors, header, pause, require_input, spinner, print_success, print_error, print_info, resize_terminal, clear_screen
+from exploration_core import Colors, header, pause, require_input, Spinner, print_success, print_error, print_info, resize_terminal, clear_screen
 
 # === Config ===
 IMAGE_FILE = "capybara.jpg"
@@ -68,10 +68,8 @@ def main():
     print(f"\n📂 Inspecting: {Colors.BOLD}{IMAGE_FILE}{Colors.END}")
     print(f"📄 Saving output to: {Colors.BOLD}{OUTPUT_FILE}{Colors.END}\n")
     print(f"🛠️ Running: exiftool {IMAGE_FILE} > {OUTPUT_FILE}")
-    spinner("Extracting metadata")
-
     try:
-        with open(output_path, "w", encoding="utf-8", errors="replace") as out_f:
+        with Spinner("Extracting metadata"), open(output_path, "w", encoding="utf-8", errors="replace") as out_f:
             subprocess.run(
                 ["exiftool", target_image],
                 stdout=out_f,
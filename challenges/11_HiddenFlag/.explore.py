@@ -6,7 +6,7 @@ import time
 
 # === Import Core ===
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
-from exploration_core import Colors, header, pause, require_input, spinner, print_success, print_error, print_info, resize_terminal, clear_screen
+from exploration_core import Colors, header, pause, require_input, Spinner, print_success, print_error, print_info, resize_terminal, clear_screen
 
 # === Config ===
 SEARCH_DIR = "junk"
@@ -60,15 +60,14 @@ def main():
 
     # 4. Execution
     print(f"\n⏳ Searching `{SEARCH_DIR}/` for '{KEYWORD}'...")
-    spinner("Scanning directories")
-
     try:
         # Run grep -r
-        result = subprocess.run(
-            ["grep", "-r", KEYWORD, search_path],
-            capture_output=True,
-            text=True
-        )
+        with Spinner("Scanning directories"):
+            result = subprocess.run(
+                ["grep", "-r", KEYWORD, search_path],
+                capture_output=True,
+                text=True
+            )
     except FileNotFoundError:
         print_error("grep command not found.")
         sys.exit(1)
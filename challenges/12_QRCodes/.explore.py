@@ -6,7 +6,7 @@ import glob
 
 # === Import Core ===
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
-from exploration_core import Colors, header, pause, require_input, spinner, print_success, print_error, print_info, resize_terminal, clear_screen
+from exploration_core import Colors, header, pause, require_input, Spinner, print_success, print_error, print_info, resize_terminal, clear_screen
 
 # === Config ===
 QR_PATTERN = "qr_*.png"
@@ -54,8 +54,6 @@ def main():
 
     # 4. Execution
     print(f"\n⏳ Scanning all files matching '{QR_PATTERN}'...")
-    spinner("Processing images")
-
     # Check if zbarimg is installed
     if shutil.which("zbarimg") is None:
         print_error("zbarimg is not installed. Please install 'zbar-tools'.")
@@ -71,7 +69,7 @@ def main():
     try:
         # We run zbarimg on the list of files
         cmd = ["zbarimg"] + files_to_scan
-        with open(output_path, "w") as out_f:
+        with Spinner("Processing images"), open(output_path, "w") as out_f:
             subprocess.run(cmd, stdout=out_f, stderr=subprocess.DEVNULL)
             
         print_success("Bulk scan complete.\n")
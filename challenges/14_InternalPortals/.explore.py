@@ -7,7 +7,7 @@ import time
 
 # === Import Core ===
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
-from exploration_core import Colors, header, pause, require_input, print_success, print_error, print_info, resize_terminal, clear_screen, spinner
+from exploration_core import Colors, header, pause, require_input, print_success, print_error, print_info, resize_terminal, clear_screen, Spinner
 
 # === Config ===
 # No external file dependencies
@@ -38,16 +38,15 @@ def inspect_portal(portal_name):
     print(f"\n🔍 Retrieving Source Code for {Colors.BOLD}{portal_name.upper()}{Colors.END}...")
     print(f"💻 Running: {Colors.CYAN}curl {url}{Colors.END}\n")
     
-    spinner("Downloading HTML")
-    print("-" * 60)
-    
     try:
         # Capture the output so we can analyze it
-        result = subprocess.run(
-            ["curl", "-s", url],
-            capture_output=True,
-            text=True
-        )
+        with Spinner("Downloading HTML"):
+            result = subprocess.run(
+                ["curl", "-s", url],
+                capture_output=True,
+                text=True
+            )
+        print("-" * 60)
         
         # Display the Raw HTML
         raw_html = result.stdout
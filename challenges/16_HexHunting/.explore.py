@@ -8,7 +8,7 @@ from pathlib import Path
 
 # === Import Core ===
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
-from exploration_core import Colors, header, pause, require_input, spinner, print_success, print_error, print_info, resize_terminal, clear_screen
+from exploration_core import Colors, header, pause, require_input, Spinner, print_success, print_error, print_info, resize_terminal, clear_screen
 
 # === Config ===
 BINARY_NAME = "hex_flag.bin"
@@ -103,9 +103,8 @@ def main():
     require_input("Type 'start' to begin the scan: ", "start")
 
     print(f"\n{Colors.CYAN}🔎 Scanning binary for flag-like patterns...{Colors.END}")
-    spinner("Scanning")
-    
-    flags = extract_flag_candidates(binary_path)
+    with Spinner("Scanning"):
+        flags = extract_flag_candidates(binary_path)
 
     if not flags:
         print_error("No flag-like patterns found in binary.")
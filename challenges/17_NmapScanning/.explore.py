@@ -7,7 +7,7 @@ import socket
 
 # === Import Core ===
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
-from exploration_core import Colors, header, pause, require_input, print_success, print_error, print_info, resize_terminal, clear_screen, spinner
+from exploration_core import Colors, header, pause, require_input, print_success, print_error, print_info, resize_terminal, clear_screen, Spinner
 
 # === Config ===
 BINARY_PORT_RANGE = "8000-8100"
@@ -115,10 +115,9 @@ def main():
 
     # 4. Scanning Phase
     print(f"\n📡 Scanning ports {BINARY_PORT_RANGE}...")
-    spinner("Knocking on ports")
-
-    scan_output = run_nmap_scan()
-    open_ports = extract_open_ports(scan_output)
+    with Spinner("Knocking on ports"):
+        scan_output = run_nmap_scan()
+        open_ports = extract_open_ports(scan_output)
     
     print_success("Scan complete.\n")
     print(f"{Colors.CYAN}📝 Raw Nmap Output:{Colors.END}")
@@ -1,37 +1,31 @@
 #!/usr/bin/env python3
 import sys
 import os
-import subprocess
 
 # Add root to path to find coach_core
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 from coach_core import Coach
+from pcap_core import scan_pcap, PcapError
 
 def get_correct_stream_id(pcap_file):
     """
-    Uses tshark to find which TCP stream actually contains the flag 'CCRI'.
+    Finds which TCP stream actually contains the flag 'CCRI' (what
+    `tshark -Y 'frame contains "CCRI"' -T fields -e tcp.stream` reports).
     Returns the stream ID (e.g., '2') as a string.
     """
     if not os.path.exists(pcap_file):
         return "0"
         
     try:
-        # We must carefully quote "CCRI" inside the filter so tshark treats it as a string
-        # Filter: frame contains "CCRI"
-        cmd = [
-            "tshark", "-r", pcap_file, 
-            "-Y", 'frame contains "CCRI"', 
-            "-T", "fields", "-e", "tcp.stream"
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        # We might get multiple packets from the same stream, so we just take the first one
-        streams = result.stdout.strip().split()
-        if streams:
-            return streams[0]
-            
-    except FileNotFoundError:
-        pass
+        # Built-in reader: one pass, same stream numbering as tshark (IPv4 and IPv6 TCP; IP
+        # fragments are not reassembled), works without Wireshark
+        _, owners = scan_pcap(pcap_file, r"CCRI")
+    except (OSError, PcapError):
+        return "0"
+
+    # Several streams may mention it; take the first one, like the tshark output would
+    if owners:
+        return str(min(owners))
     return "0" 
 
 def main():
@@ -1,14 +1,15 @@
 #!/usr/bin/env python3
 import os
 import sys
-import subprocess
 import time
 import re
+import shutil
 from pathlib import Path
 
 # === Import Core ===
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
-from exploration_core import Colors, header, pause, require_input, spinner, print_success, print_error, print_info, resize_terminal, clear_screen
+from exploration_core import Colors, header, require_input, Spinner, print_success, print_error, print_info, resize_terminal, clear_screen
+from pcap_core import StreamIndex, PcapError, scan_pcap
 
 # === Config ===
 PCAP_FILE = "traffic.pcap"
@@ -20,102 +21,60 @@ FLAG_REGEX = re.compile(
 
 # === Helpers ===
 def check_tshark():
-    try:
-        subprocess.run(
-            ["tshark", "-v"],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL
-        )
-    except FileNotFoundError:
-        print_error("tshark is not installed.")
-        print_info("On Debian/Parrot: sudo apt install tshark")
-        pause()
-        sys.exit(1)
+    """True when tshark is installed. This script never needs it; students use it by hand."""
+    return shutil.which("tshark") is not None
 
 # === Flag Extraction Phase ===
 def extract_flag_candidates(pcap_path):
-    # We pipe shell commands, so we use shell=True safely here with a controlled path
-    # Strategy: Dump all TCP payloads -> Convert Hex to Bin -> Extract Strings
-    cmd = f"tshark -r '{str(pcap_path)}' -Y tcp -T fields -e tcp.payload | xxd -r -p | strings"
+    """
+    One pass over the capture with the built-in reader (pcap_core): every TCP stream is
+    reassembled in memory and searched for flag patterns.
+    Returns (list of flags, {stream_id: set of flags}).
+    """
     try:
-        result = subprocess.run(cmd, shell=True, stdout=subprocess.PIPE, text=True)
-    except Exception as e:
-        print_error(f"Error running extraction: {e}")
-        return []
+        _, stream_map = scan_pcap(pcap_path, FLAG_REGEX)
+    except (OSError, PcapError) as e:
+        print_error(f"Error reading capture: {e}")
+        return [], {}
 
     found = set()
-    for line in result.stdout.splitlines():
-        match = FLAG_REGEX.search(line)
-        if match:
-            found.add(match.group(0).strip())
-
-    return list(found)
+    for flags in stream_map.values():
+        found.update(flags)
+    return list(found), stream_map
 
 # === Flag-to-Stream Mapping ===
-def map_flags_to_streams(pcap_path, flags):
-    stream_map = {}
-    
-    # Get Stream ID and Payload for every packet
-    result = subprocess.run(
-        ["tshark", "-r", str(pcap_path), "-Y", "tcp", "-T", "fields", "-e", "tcp.stream", "-e", "tcp.payload"],
-        stdout=subprocess.PIPE,
-        text=True
-    )
-
-    stream_data = {}
-    for line in result.stdout.strip().splitlines():
-        parts = line.split('\t')
-        if len(parts) != 2: continue
-        stream_id, hex_payload = parts
-        try:
-            stream_id = int(stream_id)
-            stream_data.setdefault(stream_id, []).append(hex_payload)
-        except ValueError:
-            continue
-
-    # Reassemble strings in memory to check which stream owns the flag
-    spinner("Mapping streams")
-    for stream_id, chunks in stream_data.items():
-        full_data = '\n'.join(chunks)
-        try:
-            # Reverse hex to ascii
-            proc = subprocess.Popen(
-                ["xxd", "-r", "-p"],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.DEVNULL,
-                text=True
-            )
-            stdout, _ = proc.communicate(input=full_data)
-            payload = stdout
-        except Exception:
-            continue
-
-        for flag in flags:
-            if flag in payload:
-                stream_map.setdefault(stream_id, set()).add(flag)
-
-    return stream_map
+def map_flags_to_streams(stream_map, flags):
+    """Keeps the streams that own at least one of `flags` (already known from the scan)."""
+    wanted = set(flags)
+    return {sid: owned & wanted for sid, owned in stream_map.items() if owned & wanted}
 
 # === Display & Interaction ===
+_stream_index = {}
+
+def follow_stream(pcap_path, sid):
+    """
+    Same layout as `tshark -qz follow,tcp,ascii,SID`, read through the sidecar stream index:
+    only the stream's own packets are read, however big the capture is.
+    """
+    index = _stream_index.get(pcap_path)
+    if index is None or not index.is_current():
+        index = _stream_index[pcap_path] = StreamIndex.open(pcap_path)
+    return index.follow(sid)
+
 def show_stream_summary(pcap_path, sid):
     header(f"🔗 Stream ID: {sid}")
-    print("Using tshark to reconstruct the full TCP conversation:")
+    print("Reconstructing the full TCP conversation (same output as):")
     print(f"  {Colors.GREEN}tshark -r traffic.pcap -qz follow,tcp,ascii,{sid}{Colors.END}\n")
     print("-" * 50)
     
-    # This shows the actual "Follow TCP Stream" output
-    subprocess.run(["tshark", "-r", str(pcap_path), "-qz", f"follow,tcp,ascii,{sid}"])
+    # This shows the "Follow TCP Stream" output
+    print(follow_stream(pcap_path, sid), end="")
     print("-" * 50)
 
 def save_summary(pcap_path, sid, notes_path):
     with open(notes_path, "a", encoding="utf-8") as f:
         f.write(f"🔗 Stream ID: {sid}\n")
-        subprocess.run(
-            ["tshark", "-r", str(pcap_path), "-qz", f"follow,tcp,ascii,{sid}"],
-            stdout=f,
-            stderr=subprocess.DEVNULL
-        )
+        f.write(follow_stream(pcap_path, sid))
         f.write("--------------------------------------\n")
     print_success(f"Saved to {notes_path.name}")
     time.sleep(1)
@@ -133,13 +92,15 @@ def main():
         print_error(f"Missing file '{pcap_path.name}'")
         sys.exit(1)
 
-    check_tshark()
-
     # 2. Mission Briefing
     header("📡 PCAP Stream Reconstructor")
     
     print(f"📄 Capture File: {Colors.BOLD}{pcap_path.name}{Colors.END}")
-    print(f"🔧 Tool in use: {Colors.BOLD}tshark{Colors.END} (Terminal Wireshark)\n")
+    print(f"🔧 Tool in use: {Colors.BOLD}tshark{Colors.END} (Terminal Wireshark)")
+    print(f"⚡ This demo:   {Colors.BOLD}built-in pcap reader{Colors.END} (one pass + stream index, no tshark start-up)\n")
+    if not check_tshark():
+        print_info("tshark is not installed; this demo still works (built-in reader), but you'll want it by hand.")
+        print_info("On Debian/Parrot: sudo apt install tshark\n")
     print("🎯 Goal: Identify the TCP Stream containing the hidden flag.\n")
     
     # Narrative Alignment: Reference the README Intel
@@ -155,11 +116,12 @@ def main():
     print("We will simulate a forensic workflow:\n")
     
     print(f"Step 1: Scan for Patterns")
-    print("   We search the raw packet payloads for 'CCRI-'.")
+    print("   We search the reassembled TCP payloads for 'CCRI-'. By hand that would be:")
     print(f"   {Colors.GREEN}tshark -r traffic.pcap -Y tcp ... | strings | grep CCRI{Colors.END}\n")
     
     print(f"Step 2: Map to Streams")
-    print("   We identify which 'TCP Stream ID' (conversation) contains that pattern.\n")
+    print("   We identify which 'TCP Stream ID' (conversation) contains that pattern.")
+    print("   (The same pass over the file already knows which stream each match came from.)\n")
     
     print(f"Step 3: Follow Stream")
     print("   We reconstruct the full conversation text.")
@@ -171,9 +133,8 @@ def main():
     if notes_path.exists(): os.remove(notes_path)
     
     print(f"\n{Colors.CYAN}🔎 Scanning entire PCAP for flag-like patterns...{Colors.END}")
-    spinner("Analyzing packets")
-
-    flags_found = extract_flag_candidates(pcap_path)
+    with Spinner("Analyzing packets"):
+        flags_found, owners = extract_flag_candidates(pcap_path)
     if not flags_found:
         print_error("No flag-like patterns found.")
         sys.exit(0)
@@ -190,7 +151,8 @@ def main():
 
     # 5. Phase 2: Map flags to streams
     print(f"\n{Colors.CYAN}🔗 Mapping detected flags to their TCP stream IDs...{Colors.END}")
-    stream_map = map_flags_to_streams(pcap_path, flags_found)
+    with Spinner("Mapping streams"):
+        stream_map = map_flags_to_streams(owners, flags_found)
     
     if not stream_map:
         print_error("No streams matched the candidate flags.")
@@ -1,86 +1,309 @@
 #!/usr/bin/env python3
-import socket
 import subprocess
 import sys
 import os
 import time
-import random
 import re
 import readline
-import glob  # <--- NEW: Needed for file matching
+
+from coach_protocol import TRANSPORTS
+from coach_engine import CoachEngine, WorkerError, WorkerTimeout, RECV_TIMEOUT, HEARTBEAT_INTERVAL
+from coach_transcript import Transcript
 
 HOST = '127.0.0.1'
+MAIN_WORKER = "main"  # the terminal every teach_step/teach_loop uses unless told otherwise
 
 class Coach:
-    def __init__(self, challenge_name):
+    def __init__(self, challenge_name, transport=None, show_progress=False, shell=None,
+                 typing=None, typing_budget_ms=None, recv_timeout=RECV_TIMEOUT, headless=None,
+                 transcript=None):
         self.challenge_name = challenge_name
-        self.port = random.randint(30000, 40000)
-        self.server_socket = None
-        self.conn = None
-        self.worker_process = None
+        # fresh = new /bin/sh per command; persistent = one bash kept alive for the session
+        self.shell_mode = (shell or os.environ.get("CCRI_WORKER_SHELL", "fresh")).lower()
+        # headless = worker runs as a plain child process (no terminal emulator, no window)
+        self.headless = bool(headless if headless is not None else os.environ.get("CCRI_HEADLESS"))
+        # Worker typing effect: instant | chunked | animated (capped at typing_budget_ms per command)
+        self.typing = (typing or os.environ.get("CCRI_TYPING", "instant" if self.headless else "animated")).lower()
+        self.typing_budget_ms = int(typing_budget_ms if typing_budget_ms is not None
+                                    else os.environ.get("CCRI_TYPING_BUDGET_MS", "300"))
+        self.show_progress = show_progress  # live "receiving output" line while commands run
+        # auto = abstract Unix socket on Linux, TCP on a free port elsewhere (see coach_protocol)
+        self.transport = (transport or os.environ.get("CCRI_COACH_TRANSPORT", "auto")).lower()
+        if self.transport not in TRANSPORTS:
+            self.transport = "auto"
+        if self.transport == "socketpair" and not self.headless:
+            # Terminal emulators hand the tab to an already-running server process, so an
+            # inherited fd never reaches the worker; connect over a Unix socket instead
+            self.transport = "auto"
+        # transcript = .jsonl file or directory to record the session in (see coach_transcript)
+        target = transcript if transcript is not None else os.environ.get("CCRI_TRANSCRIPT", "")
+        self.transcript = Transcript.for_session(challenge_name, target) if target else None
+        # autopilot = answer every prompt with the step's expected command (headless test runs)
+        self.autopilot = bool(os.environ.get("CCRI_AUTOPILOT"))
+        self.last_result = None   # reply dict of the last command run on a worker
         self.root_dir = os.path.dirname(os.path.abspath(__file__))
         self.worker_script = os.path.join(self.root_dir, "worker_node.py")
+
+        # === Engine: every worker connection lives on its asyncio loop ===
+        self.engine = CoachEngine(self.transport, recv_timeout=recv_timeout, on_output=self._on_output)
+        self._worker_titles = {}  # name -> window title, reused when a worker is respawned
         
-        # === NEW: SETUP TAB COMPLETION ===
+        # === TAB COMPLETION ===
+        self._expected_commands = ()   # what the current step wants typed
+        self._completion_worker = MAIN_WORKER
+        self._completion_key = None    # (line before word, word, cwd) of the cached candidates
+        self._completion_options = []
+        self._dir_cache = {}           # dir path -> (mtime_ns, [(name, is_dir), ...])
         self._setup_autocomplete()
 
     def _setup_autocomplete(self):
-        """Configures readline to autocomplete filenames when TAB is pressed."""
+        """Configures readline to autocomplete filenames (in the worker's cwd) and expected commands."""
         def path_completer(text, state):
-            # 1. Get list of files matching the input 'text'
-            options = glob.glob(text + '*')
-            # 2. Add a trailing slash to directories for better UX
-            options = [x + ("/" if os.path.isdir(x) else "") for x in options]
-            # 3. Return the match based on state (readline requirement)
-            return (options + [None])[state]
+            # readline asks once per state index; compute the list only for the first one
+            line = readline.get_line_buffer()[:readline.get_begidx()]
+            link = self.engine.workers.get(self._completion_worker)
+            cwd = (link.cwd if link else None) or os.getcwd()
+            key = (line, text, cwd)
+            if state == 0 or key != self._completion_key:
+                self._completion_key = key
+                self._completion_options = self._complete(line, text, cwd)
+            options = self._completion_options
+            return options[state] if state < len(options) else None
 
         # Use space as the delimiter (so 'cat file' completes 'file', not 'cat file')
         readline.set_completer_delims(' \t\n;')
         readline.parse_and_bind("tab: complete")
         readline.set_completer(path_completer)
 
+    def _complete(self, line, text, cwd):
+        """Candidates for `text`: the rest of an expected command, then matching paths."""
+        options = []
+        for expected in self._expected_commands:
+            if expected.startswith(line) and expected[len(line):].startswith(text):
+                options.append(expected[len(line):])
+
+        folder, prefix = os.path.split(text)
+        target = os.path.join(cwd, os.path.expanduser(folder))
+        for name, is_dir in self._list_dir(target):
+            if name.startswith(prefix) and (prefix.startswith(".") or not name.startswith(".")):
+                options.append(os.path.join(folder, name) + ("/" if is_dir else ""))
+        return options
+
+    def _list_dir(self, path):
+        """Directory entries, cached until the directory's mtime changes."""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return []
+        cached = self._dir_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        try:
+            with os.scandir(path) as it:
+                entries = sorted((e.name, e.is_dir()) for e in it)
+        except OSError:
+            entries = []
+        self._dir_cache[path] = (mtime, entries)
+        return entries
+
+    def _expect(self, commands, worker=MAIN_WORKER):
+        """Tells the completer what the current step expects (and which worker's cwd to use)."""
+        self._expected_commands = tuple(c for c in commands if c)
+        self._completion_worker = worker
+        self._completion_key = None
+
     def start(self):
-        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.server_socket.bind((HOST, self.port))
-        self.server_socket.listen(1)
-        self._spawn_worker()
         print("⏳ Waiting for worker terminal...")
-        self.conn, _ = self.server_socket.accept()
+        self.add_worker(MAIN_WORKER)
+        if self.transcript:
+            self.transcript.session(self.challenge_name, self.shell_mode, cwd=self.worker_cwd)
         print("✅ Connected!\n")
         print("========================================")
         print(f" 🎓 COACH MODE: {self.challenge_name}")
         print("========================================\n")
 
-    def _spawn_worker(self):
-        if not os.path.exists(self.worker_script):
-            print(f"❌ Error: Missing {self.worker_script}")
+    def add_worker(self, name, title=None, cwd=None):
+        """
+        Opens another worker terminal (e.g. "server" next to the main "attacker" one).
+        Commands reach it through the worker= argument of run_command/teach_step/teach_loop.
+        cwd starts the worker in that directory (used to resume a respawned session).
+        """
+        self._worker_titles[name] = title
+        spawn = lambda address, pass_fds: self._spawn_worker(address, pass_fds, name=name, title=title, cwd=cwd)
+        try:
+            return self.engine.call(self.engine.connect_worker(name, spawn))
+        except WorkerError as e:
+            print(f"❌ {e}")
             sys.exit(1)
+
+    @property
+    def worker_process(self):
+        link = self.engine.workers.get(MAIN_WORKER)
+        return link.process if link else None
+
+    @property
+    def worker_cwd(self):
+        """Main worker's working directory, as last reported."""
+        link = self.engine.workers.get(MAIN_WORKER)
+        return link.cwd if link else None
+
+    def _worker_args(self, address, cwd=None):
+        """worker_node.py command line (without the terminal emulator around it)."""
+        args = [
+            self.worker_script, address,
+            f"--shell={self.shell_mode}",
+            f"--typing={self.typing}",
+            f"--typing-budget={self.typing_budget_ms}",
+            f"--heartbeat={HEARTBEAT_INTERVAL:g}",
+        ]
+        if cwd:
+            args.append(f"--cwd={cwd}")
+        return args
+
+    def _spawn_worker(self, address, pass_fds=(), name=MAIN_WORKER, title=None, cwd=None):
+        """Launches a worker terminal pointed at `address`; runs on an engine executor thread."""
+        if not os.path.exists(self.worker_script):
+            raise WorkerError(f"Error: Missing {self.worker_script}")
+        if self.headless:
+            # Plain child process: its prompt/typing output goes nowhere, results come over the socket
+            try:
+                return subprocess.Popen([sys.executable] + self._worker_args(address, cwd), pass_fds=pass_fds,
+                                        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.DEVNULL)
+            except Exception as e:
+                raise WorkerError(f"Failed to launch worker: {e}")
+
         term_cmd = "mate-terminal"
         if subprocess.call(["which", "mate-terminal"], stdout=subprocess.DEVNULL) != 0:
             term_cmd = "x-terminal-emulator"
-            
+
+        # Extra terminals cascade down-left of the main one so they don't stack exactly
+        offset = 40 * len(self.engine.workers)
+        if title is None:
+            title = self.challenge_name if name == MAIN_WORKER else f"{self.challenge_name} ({name})"
         cmd = [
             term_cmd, 
-            f"--geometry=90x35+1000+100", 
-            f"--title=Worker: {self.challenge_name}", 
+            f"--geometry=90x35+{1000 - offset}+{100 + offset}",
+            f"--title=Worker: {title}",
             "--", 
-            "python3", self.worker_script, str(self.port)
+            "python3", *self._worker_args(address, cwd),
         ]
         
         try:
-            self.worker_process = subprocess.Popen(cmd)
+            return subprocess.Popen(cmd, pass_fds=pass_fds)
         except Exception as e:
-            print(f"❌ Failed to launch terminal: {e}")
+            raise WorkerError(f"Failed to launch terminal: {e}")
+
+    # === Worker Protocol ===
+    def send_command(self, cmd, silent=False, capture=False, stream=True, worker=MAIN_WORKER):
+        """Queues a command on a worker and returns its request id without waiting."""
+        return self.engine.call(self.engine.submit(worker, cmd, silent=silent, capture=capture, stream=stream))
+
+    def wait_for(self, request_id):
+        """
+        Blocks until the worker reports the result of `request_id`; returns the reply dict.
+        Streamed output is folded into reply["output"] (last OUTPUT_TAIL_LIMIT chars) unless
+        the worker already sent a captured copy. Raises WorkerError if the worker dies, or
+        WorkerTimeout if it stays silent longer than the engine's receive timeout.
+        """
+        try:
+            return self.engine.call(self.engine.wait(request_id))
+        finally:
+            if self.show_progress:
+                sys.stdout.write("\r\033[K")
+                sys.stdout.flush()
+
+    def _on_output(self, link, msg, lines):
+        """Engine callback for streamed output: optional live progress line."""
+        if self.show_progress:
+            label = "Worker" if link.name == MAIN_WORKER else f"Worker {link.name}"
+            sys.stdout.write(f"\r\033[K📡 {label} output: {lines} lines")
+            sys.stdout.flush()
+
+    def run_command(self, cmd, silent=False, capture=False, worker=MAIN_WORKER):
+        """
+        Runs a command on a worker and waits for {"exit_code", "output"}.
+        If the worker died, offers to respawn it and runs the command again there. A worker
+        that is merely slow is left alone: the command is not re-run (it may have side
+        effects) and the reply has exit_code None.
+        """
+        self._ensure_worker(worker)
+        try:
+            return self.wait_for(self.send_command(cmd, silent=silent, capture=capture, worker=worker))
+        except WorkerTimeout as e:
+            print(f"\n⚠️  {e}")
+            print("   The command is still running in the worker terminal; it was not restarted.")
+            return {"exit_code": None, "output": "", "timed_out": True}
+        except WorkerError as e:
+            self._recover_worker(worker, e)
+            return self.wait_for(self.send_command(cmd, silent=silent, capture=capture, worker=worker))
+
+    def _ensure_worker(self, worker):
+        link = self.engine.workers.get(worker)
+        if link and link.closed:
+            self._recover_worker(worker, link.error)
+
+    def _recover_worker(self, worker, error):
+        """Asks to respawn a dead worker terminal and restores its working directory."""
+        link = self.engine.workers.get(worker)
+        cwd = link.cwd if link else None
+        print(f"\n⚠️  {error}")
+        print("   The worker terminal was closed or stopped responding.")
+        try:
+            question = "🔄 Open a new worker terminal and continue where you left off? [Y/n] "
+            answer = "y" if self.autopilot else input(question).strip().lower()
+        except EOFError:
+            answer = "n"
+        if answer not in ("", "y", "yes"):
+            print("\n👋 Exiting session...")
+            self.engine.shutdown()
             sys.exit(1)
+        print("⏳ Waiting for worker terminal...")
+        self.add_worker(worker, title=self._worker_titles.get(worker), cwd=cwd)
+        print(f"✅ Reconnected{f' in {cwd}' if cwd else ''}.")
 
-    def _clean_files(self, file_list):
+    def run_parallel(self, commands, capture=False):
+        """Runs {worker_name: cmd} on several workers at once; returns {worker_name: reply}."""
+        replies = self.engine.call(self.engine.run_parallel(commands, capture=capture))
+        for reply in replies.values():
+            if isinstance(reply, Exception):
+                raise reply
+        return replies
+
+    def _result_matches(self, output_regex=None, expect_exit=None):
+        """Checks the last command's real result (exit status / output) against expectations."""
+        result = self.last_result or {}
+        if expect_exit is not None and result.get("exit_code") != expect_exit:
+            return False
+        if output_regex and not re.search(output_regex, result.get("output") or "", re.MULTILINE):
+            return False
+        return True
+
+    def _clean_files(self, file_list, worker=MAIN_WORKER):
         if not file_list: return
         cmd = "rm -f " + " ".join(file_list)
-        self.conn.sendall(f"SILENT:{cmd}".encode('utf-8'))
-        _ = self.conn.recv(1024)
+        self._ensure_worker(worker)
+        # The worker runs commands in order, so the next command can be pipelined behind this one
+        self.engine.call(self.engine.submit(worker, cmd, silent=True, forget=True))
 
-    def _get_input(self):
-        """Robust input handler that catches Ctrl+D (EOF)."""
+    def _get_input(self, answer=None):
+        """
+        Robust input handler that catches Ctrl+D (EOF).
+        In autopilot mode `answer` is typed instead. With no answer, the next line of a
+        non-interactive stdin is used (an input file filling in placeholders); without one
+        the session aborts.
+        """
+        if self.autopilot:
+            if answer is None and not sys.stdin.isatty():
+                answer = sys.stdin.readline().strip() or None
+            if answer is None:
+                print("\n🤖 Autopilot has no (further) answer for this step. Aborting.")
+                if self.transcript:
+                    self.transcript.end()
+                self.engine.shutdown()
+                sys.exit(2)
+            print(f"\n> {answer}")
+            return answer
         try:
             return input("\n> ").strip()
         except EOFError:
@@ -88,15 +311,54 @@ class Coach:
             self.finish()
             sys.exit(0)
 
-    def teach_step(self, instruction, command_to_display, command_regex=None, clean_files=None):
-        if clean_files: self._clean_files(clean_files)
+    @staticmethod
+    def _regex_example(pattern):
+        """Returns the one string an anchored, literal-only regex accepts (or None)."""
+        body = pattern[1:] if pattern.startswith("^") else pattern
+        if body.endswith("$") and not body.endswith("\\$"):
+            body = body[:-1]
+        out = []
+        i = 0
+        while i < len(body):
+            c = body[i]
+            if c == "\\" and i + 1 < len(body) and not body[i + 1].isalnum():
+                out.append(body[i + 1])
+                i += 2
+                continue
+            if c in "\\.^$*+?{}[]|()":
+                return None
+            out.append(c)
+            i += 1
+        example = "".join(out)
+        return example if re.search(pattern, example) else None
+
+    def _loop_answer(self, command_template, command_prefix, correct_password, command_regex):
+        """Best autopilot answer for a teach_loop step."""
+        if correct_password is not None:
+            return f"{command_prefix.rstrip()} {correct_password}"
+        if command_regex:
+            example = self._regex_example(command_regex)
+            if example is None and command_template.startswith(command_prefix) \
+                    and "[" not in command_template and re.search(command_regex, command_template):
+                example = command_template  # regex has optional parts/groups; the template fits it
+            return example
+        if command_template.startswith(command_prefix) and "[" not in command_template:
+            return command_template
+        return None
+
+    def teach_step(self, instruction, command_to_display, command_regex=None, clean_files=None, worker=MAIN_WORKER):
+        if clean_files: self._clean_files(clean_files, worker=worker)
 
         print(f"\n\033[96m{instruction}\033[0m")
         print(f"\n👉 Type exactly this command:\n   \033[1;93m{command_to_display}\033[0m")
 
+        self._expect([command_to_display], worker)
+        shown = time.monotonic()
+        attempts = []  # (seconds since shown, input, verdict) for the transcript
         while True:
             # Use the robust input method
-            user_input = self._get_input()
+            user_input = self._get_input(None if attempts else command_to_display)
+            typed_at = time.monotonic() - shown
             
             valid = False
             if command_regex:
@@ -109,42 +371,64 @@ class Coach:
 
             if valid:
                 print("✅ Correct.")
-                self.conn.sendall(command_to_display.encode('utf-8'))
-                _ = self.conn.recv(1024)
+                attempts.append((typed_at, user_input, "ok"))
+                self.last_result = self.run_command(command_to_display, worker=worker)
+                self._record("step", worker, instruction, command_to_display, command_to_display,
+                             attempts, shown, typed_at, clean_files)
                 return
             else:
+                attempts.append((typed_at, user_input, "mismatch"))
                 print(f"❌ Incorrect. Please type exactly: \033[1;93m{command_to_display}\033[0m")
 
-    def teach_loop(self, instruction, command_template, command_prefix, correct_password=None, command_regex=None, clean_files=None):
+    def teach_loop(self, instruction, command_template, command_prefix, correct_password=None, command_regex=None, clean_files=None,
+                   output_regex=None, expect_exit=None, worker=MAIN_WORKER):
         """
         Loops until the user runs a command that matches specific criteria.
+        output_regex / expect_exit additionally check what the command actually did
+        (e.g. output_regex=r"inflating:" for unzip) using the output streamed back by the worker.
+        worker selects the terminal the command runs in (see add_worker).
         """
         print(f"\n\033[96m{instruction}\033[0m")
         print(f"\n👉 Use this format:\n   \033[1;93m{command_template}\033[0m")
 
+        templated = "[" in command_template or "<" in command_template
+        self._expect([command_prefix] + ([] if templated else [command_template]), worker)
+        shown = time.monotonic()
+        attempts = []  # (seconds since shown, input, verdict) for the transcript
+        note = lambda verdict: attempts.append((typed_at, user_input, verdict))
+        answer = self._loop_answer(command_template, command_prefix, correct_password, command_regex) if self.autopilot else None
         while True:
-            user_input = self._get_input()
+            user_input = self._get_input(None if attempts else answer)
+            typed_at = time.monotonic() - shown
 
             # 1. Strict Prefix Check (Exact Match for the start)
             if not user_input.startswith(command_prefix):
+                 note("syntax")
                  print(f"❌ Syntax Error. The command must start exactly like this:\n   \033[1;93m{command_prefix}...\033[0m")
                  continue
             
-            if clean_files: self._clean_files(clean_files)
+            if clean_files: self._clean_files(clean_files, worker=worker)
 
             print("⏳ Executing...")
-            self.conn.sendall(user_input.encode('utf-8'))
-            _ = self.conn.recv(1024) 
+            self.last_result = self.run_command(user_input, worker=worker)
 
-            # 2. Validation Logic
+            # 2. Result Validation (what really happened on the worker)
+            if not self._result_matches(output_regex, expect_exit):
+                note("result")
+                print("⚠️  Command ran, but the result doesn't look right. Check the worker window and try again!")
+                continue
+
+            # 3. Validation Logic
             
             # OPTION A: Regex Validation (For dynamic args)
             if command_regex:
                 # We use re.search, but the regex provided MUST have ^ and $ to be exact
                 if re.search(command_regex, user_input):
                     print("✅ Good command usage.")
-                    return
+                    note("ok")
+                    break
                 else:
+                    note("format")
                     print("⚠️  Command ran, but it didn't match the expected format. Try again!")
                     continue
 
@@ -154,23 +438,37 @@ class Coach:
                 # EXACT match for the variable part
                 if user_args == correct_password:
                     print("✅ Excellent! Correct argument/password.")
-                    return
+                    note("ok")
+                    break
                 else:
+                    note("password")
                     print(f"⚠️  Command ran, but '{user_args}' is not the correct password. Try again!")
                     continue
-            
+
+            note("ok")
+            break
+
+        self._record("loop", worker, instruction, command_template, user_input,
+                     attempts, shown, typed_at, clean_files)
+
+    def _record(self, kind, worker, instruction, expected, command, attempts, shown, think_s, clean_files):
+        """Appends the finished step to the session transcript, if one is being kept."""
+        if not self.transcript:
             return
+        run_s = time.monotonic() - shown - think_s
+        self.transcript.step(kind, worker, instruction, expected, command, attempts,
+                             self.last_result, think_s, run_s, clean_files)
 
     def finish(self):
         print("\n🎉 \033[1;32mMISSION COMPLETE!\033[0m")
         print("You have successfully completed this guided exercise.")
         try:
-            input("\nPress [ENTER] to close these windows and return to the dashboard...")
+            if not self.autopilot:
+                input("\nPress [ENTER] to close these windows and return to the dashboard...")
         except EOFError:
             pass
         
-        if self.conn:
-            try: self.conn.sendall(b"EXIT")
-            except: pass
-            self.conn.close()
-        if self.server_socket: self.server_socket.close()
\ No newline at end of file
+        if self.transcript:
+            self.transcript.end()
+        try: self.engine.shutdown()
+        except Exception: pass
\ No newline at end of file
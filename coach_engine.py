@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+import os
+import socket
+import asyncio
+import threading
+from collections import OrderedDict
+
+from coach_protocol import encode_message, read_message, listen_endpoint, socketpair_endpoint, ProtocolError
+
+# === Coach Engine ===
+# asyncio core behind coach_core.Coach. One event loop (on a background thread) owns every
+# worker connection, so a coach can drive several terminals at once ("attacker" + "server")
+# while the synchronous teach_step/teach_loop API keeps working on top of it.
+
+HANDSHAKE_TIMEOUT = 30  # seconds to wait for a worker terminal to connect and say hello
+# Longest a worker may stay completely silent while the coach waits on it (CCRI_COACH_TIMEOUT)
+RECV_TIMEOUT = float(os.environ.get("CCRI_COACH_TIMEOUT", "600"))
+OUTPUT_TAIL_LIMIT = 64 * 1024  # streamed output kept per command for validation
+# Finished replies nobody is waiting on yet (submit, then wait) are kept for the last few
+# requests only, so sends that are never waited on don't pile up for the whole session
+UNCLAIMED_LIMIT = 16
+# Workers started with --heartbeat=N send a frame every N seconds, even mid-command;
+# missing HEARTBEAT_MISSES of them in a row means the worker is gone (CCRI_HEARTBEAT)
+HEARTBEAT_INTERVAL = float(os.environ.get("CCRI_HEARTBEAT", "2"))
+HEARTBEAT_MISSES = 3
+
+
+class WorkerError(ConnectionError):
+    """A worker terminal could not be started, disconnected, or stopped answering."""
+
+
+class WorkerTimeout(WorkerError):
+    """
+    No reply within the receive timeout from a worker that may still be alive (no missed
+    heartbeats, no disconnect). The link stays open and the command keeps running there.
+    """
+
+
+class WorkerLink:
+    """State of one connected worker terminal."""
+
+    def __init__(self, name, reader, writer, hello, process=None):
+        self.name = name
+        self.reader = reader
+        self.writer = writer
+        self.process = process
+        self.pid = hello.get("pid")
+        self.cwd = hello.get("cwd")   # updated from every "done" frame
+        self.heartbeat = float(hello.get("heartbeat") or 0)
+        self.last_heard = 0.0         # loop time of the last frame received
+        self.closed = False
+        self.error = None             # why the link closed, if it did
+        self.futures = {}             # request id -> Future for the "done" reply
+        self.forgotten = set()        # ids whose replies nobody waits for
+        self.tails = {}               # request id -> last OUTPUT_TAIL_LIMIT chars of streamed output
+        self.lines = {}               # request id -> number of lines streamed so far
+        self.task = None
+        self.watch_task = None
+
+    def silence_limit(self, recv_timeout):
+        """Seconds of silence after which this worker counts as dead."""
+        if self.heartbeat > 0:
+            limit = self.heartbeat * HEARTBEAT_MISSES + 1
+            return min(limit, recv_timeout) if recv_timeout else limit
+        return recv_timeout
+
+    def process_exited(self):
+        """
+        True once the worker process is gone. The pid from hello is checked directly;
+        the Popen handle is polled (and reaped) too, but only counts when it *is* the
+        worker, since terminal launchers like mate-terminal return straight away.
+        """
+        if self.process is not None and self.process.poll() is not None and self.process.pid == self.pid:
+            return True
+        if not self.pid:
+            return False
+        try:
+            os.kill(self.pid, 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass
+        return False
+
+
+class CoachEngine:
+    """
+    Owns the worker connections and runs the protocol on an asyncio loop.
+
+    Coroutines (connect_worker, submit, wait, request, close) run on the engine's loop;
+    synchronous callers go through call(), which blocks until the coroutine finishes.
+    """
+
+    def __init__(self, transport="auto", recv_timeout=RECV_TIMEOUT, on_output=None):
+        self.transport = transport
+        self.recv_timeout = recv_timeout
+        self.on_output = on_output    # callback(link, msg, lines) for every output frame
+        self.workers = {}             # name -> WorkerLink
+        self._requests = {}           # request id -> (WorkerLink, Future, sent_at) until done or waited on
+        self._unclaimed = OrderedDict()   # request id -> finished Future nobody has waited on yet
+        self._next_id = 0
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="coach-engine", daemon=True)
+        self._thread.start()
+
+    def call(self, coro):
+        """Runs `coro` on the engine loop and returns its result (sync bridge)."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    # === Connections ===
+    async def connect_worker(self, name, spawn):
+        """
+        Opens an endpoint, calls spawn(address, pass_fds) -> process in a thread, and
+        waits (bounded by HANDSHAKE_TIMEOUT) for the worker's hello. Returns the WorkerLink.
+        """
+        if self.transport == "socketpair":
+            coach_sock, worker_sock, address = socketpair_endpoint()
+            try:
+                process = await self.loop.run_in_executor(None, spawn, address, (worker_sock.fileno(),))
+            finally:
+                worker_sock.close()
+            reader, writer = await asyncio.open_connection(sock=coach_sock)
+        else:
+            server_socket, address = listen_endpoint(self.transport)
+            accepted = self.loop.create_future()
+
+            def on_connect(reader, writer):
+                if accepted.done():
+                    writer.close()
+                else:
+                    accepted.set_result((reader, writer))
+
+            if server_socket.family == socket.AF_UNIX:
+                server = await asyncio.start_unix_server(on_connect, sock=server_socket)
+            else:
+                server = await asyncio.start_server(on_connect, sock=server_socket)
+            try:
+                process = await self.loop.run_in_executor(None, spawn, address, ())
+                reader, writer = await asyncio.wait_for(accepted, HANDSHAKE_TIMEOUT)
+            except asyncio.TimeoutError:
+                raise WorkerError(f"The '{name}' worker terminal never connected.")
+            finally:
+                server.close()
+
+        try:
+            hello = await asyncio.wait_for(read_message(reader), HANDSHAKE_TIMEOUT)
+        except (asyncio.TimeoutError, ProtocolError, OSError):
+            hello = None
+        if not hello or hello.get("type") != "hello":
+            writer.close()
+            raise WorkerError(f"The '{name}' worker terminal did not finish connecting.")
+
+        link = WorkerLink(name, reader, writer, hello, process)
+        link.last_heard = self.loop.time()
+        link.task = self.loop.create_task(self._read_loop(link))
+        link.watch_task = self.loop.create_task(self._watch(link))
+        self.workers[name] = link
+        return link
+
+    async def _watch(self, link):
+        """Polls the worker process and its heartbeat so a crash is noticed even between commands."""
+        interval = link.heartbeat or HEARTBEAT_INTERVAL
+        while not link.closed:
+            await asyncio.sleep(interval)
+            if link.closed:
+                return
+            if link.process_exited():
+                self._drop(link, WorkerError(f"Worker '{link.name}' exited."))
+            elif link.heartbeat and self.loop.time() - link.last_heard > link.silence_limit(self.recv_timeout):
+                self._drop(link, WorkerError(f"Worker '{link.name}' stopped sending heartbeats."))
+
+    async def _read_loop(self, link):
+        """Dispatches frames from one worker until it disconnects."""
+        error = None
+        try:
+            while True:
+                msg = await read_message(link.reader)
+                if msg is None:
+                    break
+                link.last_heard = self.loop.time()
+                self._dispatch(link, msg)
+        except (ProtocolError, OSError) as e:
+            error = e
+        self._drop(link, WorkerError(f"Worker '{link.name}' disconnected" + (f": {error}" if error else ".")))
+
+    def _dispatch(self, link, msg):
+        msg_id = msg.get("id")
+        kind = msg.get("type")
+        if kind == "done" and msg.get("cwd"):
+            link.cwd = msg["cwd"]
+        if msg_id in link.forgotten:
+            if kind == "done":
+                link.forgotten.discard(msg_id)
+            return
+        if kind == "output":
+            data = msg.get("data", "")
+            link.tails[msg_id] = (link.tails.get(msg_id, "") + data)[-OUTPUT_TAIL_LIMIT:]
+            link.lines[msg_id] = link.lines.get(msg_id, 0) + data.count("\n")
+            if self.on_output:
+                self.on_output(link, msg, link.lines[msg_id])
+        elif kind == "done":
+            tail = link.tails.pop(msg_id, None)
+            link.lines.pop(msg_id, None)
+            if msg.get("output") is None and tail is not None:
+                msg["output"] = tail
+            future = link.futures.pop(msg_id, None)
+            if future and not future.done():
+                future.set_result(msg)
+            self._unclaim(msg_id)
+
+    def _drop(self, link, error):
+        """Marks a link dead and fails everything still waiting on it."""
+        if link.closed:
+            return
+        link.closed = True
+        link.error = error
+        for request_id, future in link.futures.items():
+            if not future.done():
+                future.set_exception(error)
+            self._unclaim(request_id)
+        link.futures.clear()
+        link.writer.close()
+
+    # === Commands ===
+    async def submit(self, name, cmd, silent=False, capture=False, stream=True, forget=False):
+        """Sends a run frame to worker `name` and returns its request id without waiting."""
+        link = self.workers[name]
+        if link.closed:
+            raise link.error
+        self._next_id += 1
+        request_id = self._next_id
+        if forget:
+            link.forgotten.add(request_id)
+        else:
+            future = self.loop.create_future()
+            link.futures[request_id] = future
+            self._requests[request_id] = (link, future, self.loop.time())
+        link.writer.write(encode_message({
+            "type": "run",
+            "id": request_id,
+            "cmd": cmd,
+            "silent": silent,
+            "capture": capture,
+            "stream": stream and not silent,
+        }))
+        try:
+            await link.writer.drain()
+        except OSError as e:
+            self._drop(link, WorkerError(f"Worker '{name}' disconnected: {e}"))
+        return request_id
+
+    async def wait(self, request_id):
+        """
+        Waits for the reply to `request_id`. Raises WorkerError if the worker disconnects or
+        misses its heartbeats, WorkerTimeout if a worker without heartbeats stays silent for
+        recv_timeout seconds (the request is then given up, the link is kept).
+        """
+        if request_id in self._unclaimed:
+            return self._unclaimed.pop(request_id).result()
+        link, future, sent_at = self._requests.pop(request_id)
+        limit = link.silence_limit(self.recv_timeout)
+        while True:
+            silent_for = self.loop.time() - max(link.last_heard, sent_at)
+            remaining = limit - silent_for if limit else None
+            if remaining is not None and remaining <= 0:
+                if link.heartbeat and silent_for >= link.silence_limit(None):
+                    self._drop(link, WorkerError(f"Worker '{link.name}' stopped sending heartbeats."))
+                    return await future
+                # Silence alone doesn't mean the worker is gone: it may just be slow
+                self._forget(link, request_id)
+                raise WorkerTimeout(f"Worker '{link.name}' sent nothing for {limit:.0f}s.")
+            done, _ = await asyncio.wait({future}, timeout=remaining)
+            if done:
+                return future.result()
+
+    def _unclaim(self, request_id):
+        """Moves a finished request nobody is waiting on yet to the bounded _unclaimed store."""
+        entry = self._requests.pop(request_id, None)
+        if entry is None:
+            return
+        future = entry[1]
+        if not future.cancelled():
+            future.exception()   # mark a failure as retrieved, in case nobody ever waits
+        self._unclaimed[request_id] = future
+        while len(self._unclaimed) > UNCLAIMED_LIMIT:
+            self._unclaimed.popitem(last=False)
+
+    def _forget(self, link, request_id):
+        """Stops tracking a request; its late output and reply are discarded."""
+        link.futures.pop(request_id, None)
+        link.tails.pop(request_id, None)
+        link.lines.pop(request_id, None)
+        link.forgotten.add(request_id)
+
+    async def request(self, name, cmd, silent=False, capture=False, stream=True):
+        """Runs a command on worker `name` and returns its reply dict."""
+        return await self.wait(await self.submit(name, cmd, silent=silent, capture=capture, stream=stream))
+
+    async def run_parallel(self, commands, capture=False):
+        """Runs {worker_name: cmd} concurrently; returns {worker_name: reply or WorkerError}."""
+        names = list(commands)
+        replies = await asyncio.gather(
+            *(self.request(name, commands[name], capture=capture) for name in names),
+            return_exceptions=True)
+        return dict(zip(names, replies))
+
+    async def close(self):
+        """Tells every worker to exit and closes the connections."""
+        for link in list(self.workers.values()):
+            if not link.closed:
+                try:
+                    link.writer.write(encode_message({"type": "exit"}))
+                    await link.writer.drain()
+                except OSError:
+                    pass
+                self._drop(link, WorkerError(f"Worker '{link.name}' was closed."))
+            if link.watch_task:
+                link.watch_task.cancel()
+            if link.task:
+                try:
+                    await asyncio.wait_for(link.task, 1)
+                except asyncio.TimeoutError:
+                    link.task.cancel()
+
+    def shutdown(self):
+        """Closes every worker and stops the loop thread."""
+        try:
+            self.call(self.close())
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=2)
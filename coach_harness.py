@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import glob
+import time
+import signal
+import socket
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from coach_transcript import load_transcript
+
+# === Headless Coach Harness ===
+# Runs every challenges/*/.coach.py end to end without a GUI: the worker is a plain child
+# process (CCRI_HEADLESS), each session is recorded (CCRI_TRANSCRIPT) and per-step latency
+# is read back from the transcripts.
+#
+# Autopilot types each step's expected command. Steps whose answer is a placeholder
+# ("-p [PASSWORD]") take the next line of INPUTS/<challenge_dir>.txt instead, fed on stdin;
+# INPUTS defaults to coach_inputs/ in the repository.
+#
+# Some challenges (13, 14, 17) talk to the web hub on port 5000; the harness launches
+# ccri_ctf.pyz once before the run (unless one is already listening) and stops it afterwards.
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPT_TIMEOUT = 300  # seconds per coach script
+INPUTS_DIR = os.path.join(ROOT_DIR, "coach_inputs")
+HUB_PORT = 5000
+HUB_START_TIMEOUT = 30  # seconds to wait for the hub to accept connections
+
+
+def discover(root=ROOT_DIR, only=None):
+    scripts = sorted(glob.glob(os.path.join(root, "challenges", "*", ".coach.py")))
+    if only:
+        scripts = [s for s in scripts if any(name in s for name in only)]
+    return scripts
+
+
+def hub_listening(port=HUB_PORT):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.settimeout(1)
+        return sock.connect_ex(("127.0.0.1", port)) == 0
+
+
+def start_hub(log_dir):
+    """
+    Launches the student hub (ccri_ctf.pyz) the way start_web_hub.py does and waits for
+    port 5000. Returns the process, or None when a hub was already running.
+    """
+    if hub_listening():
+        print("🌐 Web hub already running (port 5000); using it.")
+        return None
+    log_file = os.path.join(log_dir, "web_server.log")
+    env = dict(os.environ, CCRI_CTF_MODE="student")
+    with open(log_file, "w") as log:
+        proc = subprocess.Popen([sys.executable, os.path.join(ROOT_DIR, "ccri_ctf.pyz")], cwd=ROOT_DIR,
+                                env=env, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+                                preexec_fn=os.setpgrp)
+    deadline = time.monotonic() + HUB_START_TIMEOUT
+    while not hub_listening():
+        if proc.poll() is not None or time.monotonic() > deadline:
+            stop_hub(proc)
+            print(f"❌ Web hub failed to start. Check logs at: {log_file}")
+            sys.exit(1)
+        time.sleep(0.2)
+    print(f"🟢 Web hub started (pid {proc.pid}, log: {log_file}).")
+    return proc
+
+
+def stop_hub(proc):
+    if proc is None or proc.poll() is not None:
+        return
+    # The hub runs in its own process group (fake services, prefork workers)
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        os.killpg(proc.pid, signal.SIGKILL)
+        proc.wait()
+    except ProcessLookupError:
+        pass
+
+
+def run_script(script, transcript_dir, inputs_dir=INPUTS_DIR, timeout=SCRIPT_TIMEOUT):
+    """Runs one coach script headlessly. Returns a result dict (status, timings, steps)."""
+    challenge = os.path.basename(os.path.dirname(script))
+    transcript = os.path.join(transcript_dir, f"{challenge}.jsonl")
+    if os.path.exists(transcript):
+        os.remove(transcript)
+    env = dict(os.environ, CCRI_HEADLESS="1", CCRI_TRANSCRIPT=transcript, CCRI_AUTOPILOT="1")
+
+    input_file = os.path.join(inputs_dir, f"{challenge}.txt") if inputs_dir else None
+    if input_file and os.path.exists(input_file):
+        stdin = open(input_file, "rb")
+    else:
+        stdin = subprocess.DEVNULL
+
+    start = time.perf_counter()
+    try:
+        # Coach scripts expect to start from the repository root ("cd challenges/...")
+        proc = subprocess.run([sys.executable, script], cwd=ROOT_DIR, env=env, stdin=stdin,
+                              stdout=subprocess.PIPE, stderr=subprocess.STDOUT, timeout=timeout)
+        code, output = proc.returncode, proc.stdout.decode("utf-8", "replace")
+    except subprocess.TimeoutExpired as e:
+        code, output = "timeout", (e.stdout or b"").decode("utf-8", "replace")
+    finally:
+        if stdin is not subprocess.DEVNULL:
+            stdin.close()
+    elapsed = time.perf_counter() - start
+
+    steps = load_transcript(transcript)[1] if os.path.exists(transcript) else []
+    return {
+        "challenge": challenge,
+        "exit": code,
+        "ok": code == 0 and "MISSION COMPLETE" in output,
+        "elapsed": elapsed,
+        "steps": [{"id": s["id"], "command": s.get("command"), "exit": s.get("exit"),
+                   "run_s": s.get("run_s", 0.0), "attempts": len(s.get("attempts", []))} for s in steps],
+        "tail": output.strip().splitlines()[-3:],
+    }
+
+
+def print_report(results, slowest=10):
+    print(f"\n{'challenge':<22} {'result':<8} {'steps':>5} {'wall':>7} {'step avg':>9} {'step max':>9}")
+    for r in results:
+        runs = [s["run_s"] for s in r["steps"]]
+        avg = sum(runs) / len(runs) * 1000 if runs else 0.0
+        peak = max(runs) * 1000 if runs else 0.0
+        status = "✅ ok" if r["ok"] else f"❌ {r['exit']}"
+        print(f"{r['challenge']:<22} {status:<8} {len(runs):>5} {r['elapsed']:>6.1f}s "
+              f"{avg:>7.1f}ms {peak:>7.1f}ms")
+
+    all_steps = [(s["run_s"], r["challenge"], s) for r in results for s in r["steps"]]
+    if all_steps:
+        all_steps.sort(key=lambda row: row[0], reverse=True)
+        print(f"\n🐢 Slowest steps:")
+        for run_s, challenge, step in all_steps[:slowest]:
+            print(f"   {run_s * 1000:8.1f} ms  {challenge} #{step['id']}  {step['command']}")
+
+    failed = [r for r in results if not r["ok"]]
+    for r in failed:
+        print(f"\n❌ {r['challenge']} (exit {r['exit']}):")
+        for line in r["tail"]:
+            print(f"   {line}")
+    print(f"\n{len(results) - len(failed)}/{len(results)} coach scripts completed.")
+    print("🧹 Coach scripts leave their outputs behind; run reset_environment.py to clean up.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run every coach script headlessly and report per-step latency")
+    parser.add_argument("challenges", nargs="*", help="Only run challenges whose folder contains one of these")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 2, help="Scripts run in parallel")
+    parser.add_argument("--inputs", default=INPUTS_DIR,
+                        help="Directory of <challenge_dir>.txt placeholder answers (default: coach_inputs/)")
+    parser.add_argument("--transcripts", help="Keep transcripts in this directory")
+    parser.add_argument("--timeout", type=int, default=SCRIPT_TIMEOUT, help="Seconds allowed per script")
+    parser.add_argument("--json", help="Also write the raw results to this file")
+    args = parser.parse_args()
+
+    scripts = discover(only=args.challenges)
+    if not scripts:
+        print("❌ No coach scripts found.")
+        sys.exit(1)
+
+    transcript_dir = args.transcripts or tempfile.mkdtemp(prefix="ccri-harness-")
+    os.makedirs(transcript_dir, exist_ok=True)
+    hub = start_hub(transcript_dir)
+    print(f"🧪 Running {len(scripts)} coach scripts, {args.jobs} at a time...")
+
+    # Each script is its own process (with its own worker process); threads only wait on them
+    try:
+        with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(lambda s: run_script(s, transcript_dir, args.inputs, args.timeout), scripts))
+    finally:
+        stop_hub(hub)
+
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    sys.exit(0 if all(r["ok"] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
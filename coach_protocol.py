@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import asyncio
+import time
+import socket
+import struct
+import secrets
+
+# === Coach <-> Worker wire protocol ===
+# Every message is a frame: a 4-byte big-endian length followed by that many bytes
+# of UTF-8 JSON. Frames never split or merge, no matter how TCP chunks the stream.
+#
+# Coach -> Worker:
+#   {"type": "run",  "id": 7, "cmd": "ls -R", "silent": false, "capture": false, "stream": true}
+#   {"type": "exit"}
+# Worker -> Coach:
+#   {"type": "hello", "pid": 1234, "cwd": "/home/student", "heartbeat": 2.0}   (first frame, signals readiness)
+#   {"type": "heartbeat"}   (every N seconds if the worker was started with --heartbeat=N)
+#   {"type": "output", "id": 7, "stream": "stdout", "data": "..."}  (zero or more, while it runs)
+#   {"type": "done", "id": 7, "exit_code": 0, "output": null}
+
+HEADER = struct.Struct("!I")
+MAX_FRAME = 16 * 1024 * 1024  # refuse absurd lengths instead of allocating them
+
+
+class ProtocolError(Exception):
+    """Raised when the peer sends something that is not a valid frame."""
+
+
+def encode_message(message):
+    """Serializes `message` (a dict) into one frame (header + JSON payload)."""
+    payload = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    return HEADER.pack(len(payload)) + payload
+
+
+def _decode_payload(payload):
+    try:
+        return json.loads(payload.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ProtocolError(f"Bad frame: {e}")
+
+
+def send_message(sock, message):
+    """Serializes `message` (a dict) and sends it as one frame."""
+    sock.sendall(encode_message(message))
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = sock.recv(min(remaining, 65536))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_message(sock):
+    """Blocks until one full frame arrives. Returns the decoded dict, or None on EOF."""
+    header = _recv_exactly(sock, HEADER.size)
+    if header is None:
+        return None
+    (length,) = HEADER.unpack(header)
+    if length > MAX_FRAME:
+        raise ProtocolError(f"Frame of {length} bytes exceeds limit")
+    payload = _recv_exactly(sock, length)
+    if payload is None:
+        return None
+    return _decode_payload(payload)
+
+
+async def read_message(reader):
+    """asyncio twin of recv_message for an asyncio.StreamReader. Returns None on EOF."""
+    try:
+        header = await reader.readexactly(HEADER.size)
+        (length,) = HEADER.unpack(header)
+        if length > MAX_FRAME:
+            raise ProtocolError(f"Frame of {length} bytes exceeds limit")
+        payload = await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        return None
+    return _decode_payload(payload)
+
+
+# === Transport ===
+# The worker is told where the coach listens with one address string:
+#   unix:@NAME       abstract-namespace Unix socket (Linux; nothing touches the filesystem)
+#   tcp:HOST:PORT    TCP fallback; the OS picks a free port, so sessions never collide
+#   fd:N             an inherited socketpair end (worker started as a direct child)
+#   PORT             legacy form, same as tcp:127.0.0.1:PORT
+LOCAL_HOST = "127.0.0.1"
+TRANSPORTS = ("auto", "unix", "tcp", "socketpair")
+
+
+def listen_endpoint(transport="auto"):
+    """Creates the coach's listening socket. Returns (server_socket, address_string)."""
+    if transport in ("auto", "unix") and sys.platform.startswith("linux"):
+        name = f"ccri-coach-{os.getpid()}-{secrets.token_hex(4)}"
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.bind("\0" + name)
+            sock.listen(1)
+            return sock, f"unix:@{name}"
+        except OSError:
+            sock.close()
+            if transport == "unix":
+                raise
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind((LOCAL_HOST, 0))
+    sock.listen(1)
+    return sock, f"tcp:{LOCAL_HOST}:{sock.getsockname()[1]}"
+
+
+def socketpair_endpoint():
+    """
+    Returns (coach_socket, worker_socket, address_string) for a worker that is a direct
+    child process. Pass worker_socket.fileno() in `pass_fds` and close it after spawning.
+    """
+    coach_sock, worker_sock = socket.socketpair()
+    worker_sock.set_inheritable(True)
+    return coach_sock, worker_sock, f"fd:{worker_sock.fileno()}"
+
+
+def connect_endpoint(address, timeout=10.0):
+    """Worker side: connects to the coach at `address`, retrying briefly if it is not up yet."""
+    if address.startswith("fd:"):
+        return socket.socket(fileno=int(address[3:]))
+
+    if address.startswith("unix:@"):
+        family, target = socket.AF_UNIX, "\0" + address[len("unix:@"):]
+    elif address.startswith("tcp:"):
+        host, _, port = address[len("tcp:"):].rpartition(":")
+        family, target = socket.AF_INET, (host or LOCAL_HOST, int(port))
+    else:
+        family, target = socket.AF_INET, (LOCAL_HOST, int(address))
+
+    deadline = time.monotonic() + timeout
+    delay = 0.01
+    while True:
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            sock.connect(target)
+            return sock
+        except OSError:
+            sock.close()
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(delay)
+            delay = min(delay * 2, 0.25)
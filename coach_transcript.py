@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+# === Coach Session Transcripts ===
+# One JSON object per line, appended (and flushed) as the session goes, so a crashed or
+# abandoned session still leaves everything up to its last step:
+#   {"t": "session", "challenge": "...", "started": 1760000000.0, "cwd": "/home/student/...", "shell": "fresh"}
+#   {"t": "step", "id": 3, "kind": "loop", "worker": "main", "instruction": "first line...",
+#    "expected": "unzip -P [PASSWORD] secret.zip", "clean": ["flag.txt"],
+#    "attempts": [[4.21, "unzip secret.zip", "syntax"], [9.80, "unzip -P letmein secret.zip", "ok"]],
+#    "command": "unzip -P letmein secret.zip", "exit": 0, "think_s": 9.8, "run_s": 0.05}
+#   {"t": "end", "elapsed": 312.4}
+# "think_s" is the time from showing the instruction to the accepted input; "run_s" is the
+# accepted command's round trip on the worker.
+
+INSTRUCTION_PREVIEW = 80  # chars of the instruction kept per step
+
+
+def _slug(text):
+    return re.sub(r"[^A-Za-z0-9]+", "_", text).strip("_")[:40] or "session"
+
+
+class Transcript:
+    """Append-only writer for one coach session."""
+
+    def __init__(self, path):
+        self.path = path
+        self.started = time.monotonic()
+        self._step = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    @classmethod
+    def for_session(cls, challenge_name, target):
+        """`target` is a .jsonl file or a directory (one file per session is created in it)."""
+        if target.endswith(".jsonl"):
+            return cls(target)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        return cls(os.path.join(target, f"{_slug(challenge_name)}-{stamp}-{os.getpid()}.jsonl"))
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def session(self, challenge_name, shell_mode, cwd=None):
+        self._write({"t": "session", "challenge": challenge_name, "started": round(time.time(), 3),
+                     "cwd": cwd or os.getcwd(), "shell": shell_mode})
+
+    def step(self, kind, worker, instruction, expected, command, attempts, result, think_s, run_s,
+             clean_files=None):
+        self._step += 1
+        record = {
+            "t": "step",
+            "id": self._step,
+            "kind": kind,
+            "worker": worker,
+            "instruction": (instruction or "").strip().splitlines()[0][:INSTRUCTION_PREVIEW] if instruction else "",
+            "expected": expected,
+            "attempts": [[round(at, 2), text, verdict] for at, text, verdict in attempts],
+            "command": command,
+            "exit": (result or {}).get("exit_code"),
+            "think_s": round(think_s, 3),
+            "run_s": round(run_s, 3),
+        }
+        if clean_files:
+            record["clean"] = list(clean_files)
+        self._write(record)
+
+    def end(self):
+        self._write({"t": "end", "elapsed": round(time.monotonic() - self.started, 3)})
+        self._file.close()
+
+
+def load_transcript(path):
+    """Returns (session_record, [step_records]). Unreadable lines are skipped."""
+    session, steps = {}, []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("t") == "session":
+                session = record
+            elif record.get("t") == "step":
+                steps.append(record)
+    return session, steps
+
+
+# === Replay ===
+def replay(path, cwd=None, transport="socketpair", shell=None):
+    """
+    Re-runs a transcript's accepted commands against a headless worker at full speed.
+    Returns a list of (step_record, reply, seconds); a step "fails" when its exit status
+    differs from the recorded one.
+    """
+    from coach_core import Coach
+
+    session, steps = load_transcript(path)
+    coach = Coach(session.get("challenge", "replay"), transport=transport,
+                  shell=shell or session.get("shell"), typing="instant", headless=True, transcript="")
+    start_dir = cwd or session.get("cwd")
+    if not start_dir or not os.path.isdir(start_dir):
+        start_dir = coach.root_dir
+    results = []
+    try:
+        for step in steps:
+            worker = step.get("worker") or "main"
+            if worker not in coach.engine.workers:
+                coach.add_worker(worker, cwd=start_dir)
+            if not step.get("command"):
+                continue
+            if step.get("clean"):
+                coach._clean_files(step["clean"], worker=worker)
+            t0 = time.perf_counter()
+            reply = coach.run_command(step["command"], worker=worker)
+            results.append((step, reply, time.perf_counter() - t0))
+    finally:
+        coach.engine.shutdown()
+    return results
+
+
+def summarize(paths):
+    """Per-step think time across transcripts: where do students stall?"""
+    by_step = {}
+    for path in paths:
+        session, steps = load_transcript(path)
+        for step in steps:
+            key = (session.get("challenge", "?"), step["id"], step.get("expected") or "")
+            stats = by_step.setdefault(key, {"think": [], "attempts": []})
+            stats["think"].append(step.get("think_s", 0))
+            stats["attempts"].append(len(step.get("attempts", [])))
+    rows = []
+    for (challenge, step_id, expected), stats in by_step.items():
+        think = sorted(stats["think"])
+        rows.append((challenge, step_id, expected, len(think), think[len(think) // 2],
+                     sum(stats["attempts"]) / len(stats["attempts"])))
+    rows.sort(key=lambda row: row[4], reverse=True)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay or summarize recorded coach sessions")
+    sub = parser.add_subparsers(dest="action", required=True)
+    p_replay = sub.add_parser("replay", help="Re-run a transcript headlessly at full speed")
+    p_replay.add_argument("transcript")
+    p_replay.add_argument("--cwd", help="Directory the worker starts in (default: the recorded one)")
+    p_stats = sub.add_parser("stats", help="Median think time and attempts per step")
+    p_stats.add_argument("transcripts", nargs="+")
+    args = parser.parse_args()
+
+    if args.action == "replay":
+        failures = 0
+        for step, reply, seconds in replay(args.transcript, cwd=args.cwd):
+            ok = reply.get("exit_code") == step.get("exit")
+            failures += not ok
+            mark = "✅" if ok else "❌"
+            print(f"{mark} step {step['id']:>2}  {seconds * 1000:7.1f} ms  exit {reply.get('exit_code')} "
+                  f"(recorded {step.get('exit')})  {step['command']}")
+        print(f"\n{'🎉 Replay matched the transcript.' if not failures else f'⚠️ {failures} step(s) differ.'}")
+        sys.exit(1 if failures else 0)
+
+    print(f"{'challenge':<28} {'step':>4} {'runs':>4} {'median think':>12} {'attempts':>8}  expected")
+    for challenge, step_id, expected, runs, median, attempts in summarize(args.transcripts):
+        print(f"{challenge[:28]:<28} {step_id:>4} {runs:>4} {median:>11.1f}s {attempts:>8.1f}  {expected}")
+
+
+if __name__ == "__main__":
+    main()
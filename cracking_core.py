@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+import os
+import base64
+import sys
+import time
+import zlib
+import shutil
+import struct
+import hashlib
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+# === Cracking Engine ===
+# Shared by the explore/coach scripts of the password challenges. Everything runs
+# in-process; no external tool is forked per candidate.
+
+REFRESH_HZ = 30          # live display updates per second, at most
+CHUNK_SIZE = 20000       # candidates per work unit handed to a pool worker
+POOL_THRESHOLD = 50000   # smaller wordlists are checked in-process (pool start-up costs more)
+
+
+def read_wordlist(path, chunk_size=CHUNK_SIZE):
+    """Yields lists of non-empty, stripped candidates (bytes) from a wordlist of any size."""
+    chunk = []
+    with open(path, "rb") as f:
+        for line in f:
+            word = line.strip()
+            if word:
+                chunk.append(word)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+    if chunk:
+        yield chunk
+
+
+# ---------- ZIP (ZipCrypto) ----------
+
+_CRC_TABLE = []
+for _n in range(256):
+    _c = _n
+    for _ in range(8):
+        _c = (_c >> 1) ^ 0xEDB88320 if _c & 1 else _c >> 1
+    _CRC_TABLE.append(_c)
+
+
+def _zipcrypto_header_ok(password, header, check_byte, crc=_CRC_TABLE):
+    """
+    Derives the ZipCrypto keys from `password`, decrypts the 12-byte encryption header and
+    compares its last byte with the entry's check byte. A wrong password passes with
+    probability 1/256, so this is only a filter in front of the full CRC verification.
+    """
+    k0, k1, k2 = 0x12345678, 0x23456789, 0x34567890
+    for c in password:
+        k0 = (k0 >> 8) ^ crc[(k0 ^ c) & 0xFF]
+        k1 = ((k1 + (k0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        k2 = (k2 >> 8) ^ crc[(k2 ^ (k1 >> 24)) & 0xFF]
+    for c in header:
+        t = (k2 | 2) & 0xFFFF
+        p = c ^ (((t * (t ^ 1)) >> 8) & 0xFF)
+        k0 = (k0 >> 8) ^ crc[(k0 ^ p) & 0xFF]
+        k1 = ((k1 + (k0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        k2 = (k2 >> 8) ^ crc[(k2 ^ (k1 >> 24)) & 0xFF]
+    return p == check_byte
+
+
+class ZipCracker:
+    """
+    Dictionary attack on a ZipCrypto-encrypted archive. The archive is parsed once; every
+    candidate is first checked against the encryption header of each encrypted entry, and
+    only survivors are verified by fully decrypting one entry (zipfile checks its CRC).
+    """
+
+    def __init__(self, zip_path):
+        self.zip_path = zip_path
+        self.headers = []   # (12-byte encryption header, check byte) per encrypted entry
+        self.verify_entry = None
+        with zipfile.ZipFile(zip_path) as zf, open(zip_path, "rb") as raw:
+            for info in zf.infolist():
+                if not info.flag_bits & 0x1:
+                    continue
+                if info.compress_type == 99:
+                    raise ValueError("AES-encrypted ZIP entries are not supported (ZipCrypto only).")
+                raw.seek(info.header_offset)
+                local = raw.read(30)
+                name_len, extra_len = struct.unpack("<HH", local[26:30])
+                raw.seek(info.header_offset + 30 + name_len + extra_len)
+                header = raw.read(12)
+                if info.flag_bits & 0x8:
+                    # Data descriptor: the check byte comes from the DOS modification time
+                    h, m, s = info.date_time[3:6]
+                    check_byte = ((h << 11 | m << 5 | s // 2) >> 8) & 0xFF
+                else:
+                    check_byte = (info.CRC >> 24) & 0xFF
+                self.headers.append((header, check_byte))
+                if self.verify_entry is None or info.file_size < self.verify_entry.file_size:
+                    self.verify_entry = info
+        if not self.headers:
+            raise ValueError(f"{os.path.basename(zip_path)} is not password protected.")
+
+    def header_ok(self, password):
+        return all(_zipcrypto_header_ok(password, header, check) for header, check in self.headers)
+
+    def verify(self, password):
+        """Full check: decrypt and decompress the smallest entry; zipfile validates the CRC."""
+        try:
+            with zipfile.ZipFile(self.zip_path) as zf:
+                zf.read(self.verify_entry, pwd=password)
+            return True
+        except (RuntimeError, zipfile.BadZipFile, zlib.error, ValueError, NotImplementedError):
+            return False
+
+    def check(self, password):
+        if isinstance(password, str):
+            password = password.encode("utf-8")
+        return self.header_ok(password) and self.verify(password)
+
+    def search(self, candidates):
+        """Returns the first matching candidate in `candidates` (bytes), or None."""
+        headers = self.headers
+        first_header, first_check = headers[0]
+        for password in candidates:
+            if not _zipcrypto_header_ok(password, first_header, first_check):
+                continue
+            if all(_zipcrypto_header_ok(password, h, c) for h, c in headers[1:]) and self.verify(password):
+                return password
+        return None
+
+    def crack(self, wordlist_path, workers=None, on_progress=None):
+        """
+        Runs the dictionary attack. Returns (password or None, candidates tested, seconds);
+        with a pool, "tested" counts every candidate a worker checked, not the hit's line number.
+        on_progress(tested, current_candidate) is called at most REFRESH_HZ times a second.
+        Large wordlists are sharded across a process pool (`workers`, default: all CPUs).
+        """
+        start = time.perf_counter()
+        workers = workers or os.cpu_count() or 1
+        use_pool = workers > 1 and os.path.getsize(wordlist_path) > POOL_THRESHOLD * 8
+        throttle = _Throttle(on_progress)
+        tested = 0
+
+        if not use_pool:
+            # Small lists: sub-chunks keep the live display moving
+            for chunk in read_wordlist(wordlist_path, chunk_size=256):
+                found = self.search(chunk)
+                if found is not None:
+                    tested += chunk.index(found) + 1
+                    throttle(tested, found, force=True)
+                    return found.decode("utf-8", "replace"), tested, time.perf_counter() - start
+                tested += len(chunk)
+                throttle(tested, chunk[-1])
+            throttle(tested, b"", force=True)
+            return None, tested, time.perf_counter() - start
+
+        found = None
+        chunks = read_wordlist(wordlist_path)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_pool_init, initargs=(self.zip_path,)) as pool:
+            pending = {}
+
+            def refill():
+                # Keep at most two chunks per worker in flight
+                while len(pending) < workers * 2:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        return
+                    pending[pool.submit(_pool_search, chunk)] = chunk
+
+            refill()
+            while pending:
+                done, _ = wait(pending, timeout=1 / REFRESH_HZ, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk = pending.pop(future)
+                    result = future.result()
+                    if result is not None and found is None:
+                        found = result
+                        tested += chunk.index(result) + 1
+                    else:
+                        tested += len(chunk)
+                        if found is None:
+                            throttle(tested, chunk[-1])
+                if found is not None:
+                    # Chunks finish out of order: ones already running are checked to the
+                    # end (the pool waits for them anyway), so they count in full
+                    for future, chunk in pending.items():
+                        if not future.cancel():
+                            future.exception()
+                            tested += len(chunk)
+                    break
+                refill()
+        throttle(tested, found or b"", force=True)
+        return (found.decode("utf-8", "replace") if found is not None else None), tested, time.perf_counter() - start
+
+
+# ---------- MD5 (hashcat -m 0 compatible) ----------
+
+# Rough start-up cost of hashcat on a CPU-only VM (--force, OpenCL emulation) and the
+# native engine's MD5 rate per core; used to pick the faster backend for a job
+HASHCAT_STARTUP_S = 5.0
+NATIVE_MD5_RATE = 1_000_000
+
+
+def load_hashes(path):
+    """Target MD5 hashes (lowercase hex) in file order; blank lines are skipped."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return [line.strip().lower() for line in f if line.strip()]
+
+
+def _md5_search(chunk, targets):
+    """Returns {hex digest: candidate} for every candidate in `chunk` whose MD5 is a target."""
+    md5 = hashlib.md5
+    found = {}
+    for word in chunk:
+        digest = md5(word).digest()
+        if digest in targets:
+            found[digest.hex()] = word
+    return found
+
+
+def crack_md5(hashes, wordlist_path, workers=None, on_progress=None):
+    """
+    Dictionary attack on raw MD5 hashes (hashcat mode 0). The wordlist is streamed in
+    batches and, for large lists, spread across a process pool. Stops once every hash
+    is cracked. Returns ({hash: password bytes}, candidates tested, seconds).
+    """
+    start = time.perf_counter()
+    targets = {bytes.fromhex(h) for h in hashes}
+    cracked = {}
+    tested = 0
+    throttle = _Throttle(on_progress)
+    workers = workers or os.cpu_count() or 1
+    use_pool = workers > 1 and os.path.getsize(wordlist_path) > POOL_THRESHOLD * 8
+
+    if not use_pool:
+        for chunk in read_wordlist(wordlist_path, chunk_size=4096):
+            cracked.update(_md5_search(chunk, targets))
+            tested += len(chunk)
+            throttle(tested, chunk[-1])
+            if len(cracked) == len(targets):
+                break
+        return cracked, tested, time.perf_counter() - start
+
+    chunks = read_wordlist(wordlist_path)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+
+        def refill():
+            # Keep at most two chunks per worker in flight
+            while len(pending) < workers * 2:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    return
+                pending[pool.submit(_md5_search, chunk, targets)] = chunk
+
+        refill()
+        while pending:
+            done, _ = wait(pending, timeout=1 / REFRESH_HZ, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = pending.pop(future)
+                cracked.update(future.result())
+                tested += len(chunk)
+                throttle(tested, chunk[-1])
+            if len(cracked) == len(targets):
+                # Chunks already running are checked to the end, so they count in full
+                for future, chunk in pending.items():
+                    if not future.cancel():
+                        cracked.update(future.result())
+                        tested += len(chunk)
+                break
+            refill()
+    return cracked, tested, time.perf_counter() - start
+
+
+def _potfile_plain(password):
+    """hashcat writes plains with non-printable bytes (or a colon) as $HEX[...]."""
+    if all(0x20 <= b < 0x7F for b in password) and b":" not in password and not password.startswith(b"$HEX["):
+        return password.decode("ascii")
+    return f"$HEX[{password.hex()}]"
+
+
+def write_potfile(path, cracked):
+    """Appends hash:plain lines like hashcat does, skipping hashes already in the potfile."""
+    known = set()
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            known = {line.split(":", 1)[0] for line in f if ":" in line}
+    with open(path, "a", encoding="utf-8") as f:
+        for digest, password in cracked.items():
+            if digest not in known:
+                f.write(f"{digest}:{_potfile_plain(password)}\n")
+
+
+def read_potfile(path):
+    """{hash: plain} from a hashcat potfile, decoding $HEX[...] plains."""
+    cracked = {}
+    if not os.path.exists(path):
+        return cracked
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if ":" not in line:
+                continue
+            digest, plain = line.rstrip("\r\n").split(":", 1)
+            if plain.startswith("$HEX[") and plain.endswith("]"):
+                try:
+                    plain = bytes.fromhex(plain[5:-1]).decode("utf-8", "replace")
+                except ValueError:
+                    pass
+            cracked[digest.lower()] = plain
+    return cracked
+
+
+def choose_md5_backend(wordlist_path, requested=None):
+    """
+    "native" or "hashcat". Auto mode (CCRI_HASH_BACKEND unset or "auto") uses hashcat only
+    when it is installed and the job would outlast hashcat's start-up time natively.
+    """
+    requested = (requested or os.environ.get("CCRI_HASH_BACKEND", "auto")).lower()
+    if requested == "native" or shutil.which("hashcat") is None:
+        return "native"
+    if requested == "hashcat":
+        return "hashcat"
+    # ~9 bytes per wordlist line is typical of password lists
+    estimated_s = os.path.getsize(wordlist_path) / 9 / (NATIVE_MD5_RATE * (os.cpu_count() or 1))
+    return "hashcat" if estimated_s > HASHCAT_STARTUP_S else "native"
+
+
+def crack_md5_to_potfile(hashes_path, wordlist_path, potfile_path, workers=None, on_progress=None):
+    """Native stand-in for `hashcat -m 0 -a 0 HASHES WORDLIST --potfile-path POTFILE`."""
+    cracked, tested, seconds = crack_md5(load_hashes(hashes_path), wordlist_path, workers, on_progress)
+    write_potfile(potfile_path, cracked)
+    return cracked, tested, seconds
+
+
+# ---------- Encrypted segments (06_Hashcat) ----------
+# Unlock -> decode -> assemble without touching the disk: each password-protected segment
+# is read straight out of its ZIP, Base64-decoded, and the decoded columns are zipped
+# row by row into candidate flags.
+
+def unlock_segments(zip_paths, passwords, materialize_dir=None):
+    """
+    Yields (zip_path, member_name, data) for each segment, data being None when the password
+    is unknown or wrong. With `materialize_dir`, each member is also written there, as
+    `unzip -o -P` would.
+    """
+    for zip_path, password in zip(zip_paths, passwords):
+        if not password:
+            yield zip_path, None, None
+            continue
+        try:
+            with zipfile.ZipFile(zip_path) as zf:
+                member = zf.infolist()[0]
+                data = zf.read(member, pwd=password.encode("utf-8"))
+        except (OSError, IndexError, RuntimeError, zipfile.BadZipFile, zlib.error):
+            yield zip_path, None, None
+            continue
+        if materialize_dir is not None:
+            with open(os.path.join(materialize_dir, os.path.basename(member.filename)), "wb") as f:
+                f.write(data)
+        yield zip_path, member.filename, data
+
+
+def decode_segment(data):
+    """Base64 segment -> list of lines, or None if it does not decode."""
+    try:
+        return base64.b64decode(data.strip()).decode("utf-8").splitlines()
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def assemble_columns(columns, separator="-", missing="???"):
+    """Joins the i-th line of every column; rows follow the first column."""
+    if not columns:
+        return []
+    return [separator.join(col[i].strip() if i < len(col) else missing for col in columns)
+            for i in range(len(columns[0]))]
+
+
+class _Throttle:
+    """Forwards progress to a callback no more than REFRESH_HZ times per second."""
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.next_at = 0.0
+
+    def __call__(self, tested, candidate, force=False):
+        if not self.callback:
+            return
+        now = time.monotonic()
+        if force or now >= self.next_at:
+            self.next_at = now + 1 / REFRESH_HZ
+            self.callback(tested, candidate.decode("utf-8", "replace"))
+
+
+# Pool workers parse the archive once, in the initializer
+_pool_cracker = None
+
+
+def _pool_init(zip_path):
+    global _pool_cracker
+    _pool_cracker = ZipCracker(zip_path)
+
+
+def _pool_search(chunk):
+    return _pool_cracker.search(chunk)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python3 cracking_core.py [ZIP_FILE] [WORDLIST]")
+        sys.exit(1)
+
+    def show(tested, candidate):
+        sys.stdout.write(f"\r[{tested:>10,}] Testing: {candidate[:30]:<30}")
+        sys.stdout.flush()
+
+    password, tested, seconds = ZipCracker(sys.argv[1]).crack(sys.argv[2], on_progress=show)
+    rate = tested / seconds if seconds else 0
+    print(f"\n{'✅ PASSWORD CRACKED: ' + password if password is not None else '❌ Password not found.'}"
+          f"  ({tested:,} candidates in {seconds:.2f}s, {rate:,.0f}/s)")
+    sys.exit(0 if password is not None else 1)
@@ -2,6 +2,7 @@
 import sys
 import os
 import time
+import threading
 
 # === 🎨 STANDARD COLORS (Matches Coach Mode) ===
 class Colors:
@@ -44,19 +45,67 @@ def require_input(prompt, expected):
             return
         print(f"{Colors.RED}↪  Please type '{expected}' to continue!{Colors.END}\n")
 
+SPINNER_FRAMES = ["|", "/", "-", "\\"]
+
 def spinner(message="Working", duration=2.0, interval=0.15):
-    """Shows a little spinning animation."""
-    frames = ["|", "/", "-", "\\"]
-    end_time = time.time() + duration
-    i = 0
-    while time.time() < end_time:
-        frame = frames[i % len(frames)]
-        sys.stdout.write(f"\r{Colors.CYAN}{message}... {frame}{Colors.END}")
+    """Shows a little spinning animation for a fixed time (for pauses with no real work behind them)."""
+    with Spinner(message, interval=interval):
+        time.sleep(duration)
+
+class Spinner:
+    """
+    Spinner that animates on a background thread while the real work runs:
+
+        with Spinner("Running Hashcat") as spin:
+            run_hashcat(...)
+            spin.update("12/50 hashes")   # optional status text, drawn on the next frame
+
+    It stops (and clears its line) as soon as the block ends. Frames are drawn at most
+    every `interval` seconds no matter how often update() is called. When stdout is not
+    a terminal the message is printed once instead.
+    """
+
+    def __init__(self, message="Working", interval=0.1):
+        self.message = message
+        self.interval = interval
+        self.status = ""
+        self._stop = threading.Event()
+        self._thread = None
+        self._width = 0
+        self._animate = sys.stdout.isatty()
+
+    def update(self, status):
+        self.status = status
+
+    def _draw(self, frame):
+        text = f"{self.message}... {frame}" + (f"  {self.status}" if self.status else "")
+        self._width = max(self._width, len(text))
+        sys.stdout.write(f"\r{Colors.CYAN}{text}{Colors.END}")
         sys.stdout.flush()
-        time.sleep(interval)
-        i += 1
-    sys.stdout.write("\r" + " " * (len(message) + 10) + "\r")
-    sys.stdout.flush()
+
+    def _run(self):
+        i = 0
+        while True:
+            self._draw(SPINNER_FRAMES[i % len(SPINNER_FRAMES)])
+            i += 1
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        if self._animate:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        else:
+            print(f"{self.message}...")
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            sys.stdout.write("\r" + " " * (self._width + 2) + "\r")
+            sys.stdout.flush()
+        return False
 
 def print_success(msg):
     print(f"{Colors.GREEN}✅ {msg}{Colors.END}")
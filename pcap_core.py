@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import json
+import mmap
+import socket
+import struct
+import hashlib
+import tempfile
+
+# === PCAP Reader ===
+# Pure-Python reader for classic libpcap captures (what tcpdump and `dumpcap -F pcap` write).
+# The file is memory-mapped and parsed in place: packet record -> IPv4/IPv6 -> TCP. Payloads
+# are never copied while scanning; a stream is just a list of (file offset, length, direction)
+# slices into the map. Stream ids follow tshark's tcp.stream numbering (order of first
+# appearance), so they can be handed straight to `tshark -z follow,tcp,ascii,ID`. IP fragments
+# are not reassembled: a conversation carried only in fragmented packets is skipped, and the
+# ids after it then differ from tshark's.
+
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+
+# IPv6 extension headers walked to reach TCP (hop-by-hop, routing, destination options)
+_IPV6_EXTENSIONS = (0, 43, 60)
+
+# magic -> byte order of the headers that follow
+_MAGIC = {
+    b"\xd4\xc3\xb2\xa1": "<",  # microsecond timestamps
+    b"\xa1\xb2\xc3\xd4": ">",
+    b"\x4d\x3c\xb2\xa1": "<",  # nanosecond timestamps
+    b"\xa1\xb2\x3c\x4d": ">",
+}
+
+TCP_FIN, TCP_SYN, TCP_RST, TCP_ACK = 0x01, 0x02, 0x04, 0x10
+FOLLOW_RULE = "=" * 67
+
+
+class PcapError(ValueError):
+    """The file is not a capture this reader understands."""
+
+
+class TCPStream:
+    """One TCP conversation. Node 0 is whoever sent the first packet seen; direction 1 is node 1."""
+
+    def __init__(self, stream_id, src, dst):
+        self.id = stream_id
+        self.nodes = (src, dst)      # ((ip, port), (ip, port))
+        self.segments = []           # (file offset, length, direction) of each payload, in order
+        self.closed = False          # FIN/RST seen; a new SYN on the same 4-tuple starts a new stream
+        self._next_seq = [None, None]
+
+    def add(self, direction, flags, seq, offset, length):
+        """Records one segment, trimming bytes already seen (retransmissions, overlaps)."""
+        if flags & TCP_SYN:
+            self._next_seq[direction] = (seq + 1 + length) & 0xFFFFFFFF
+        if flags & (TCP_FIN | TCP_RST):
+            self.closed = True
+        if not length or flags & TCP_SYN:
+            return
+        expected = self._next_seq[direction]
+        if expected is not None:
+            behind = (expected - seq) & 0xFFFFFFFF
+            if 0 < behind < 0x80000000:
+                if behind >= length:
+                    return
+                offset, length, seq = offset + behind, length - behind, expected
+        self._next_seq[direction] = (seq + length) & 0xFFFFFFFF
+        self.segments.append((offset, length, direction))
+
+
+class PcapReader:
+    """Memory-mapped pcap file. Use as a context manager, or call close()."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._file = open(self.path, "rb")
+        try:
+            if os.fstat(self._file.fileno()).st_size < 24:
+                raise PcapError(f"{os.path.basename(self.path)} is too short to be a pcap file.")
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+        order = _MAGIC.get(self.data[:4])
+        if order is None:
+            self.close()
+            raise PcapError(f"{os.path.basename(self.path)} is not a classic pcap file (pcapng is not supported).")
+        self._record = struct.Struct(order + "IIII")
+        self.linktype = struct.unpack_from(order + "I", self.data, 20)[0] & 0x0FFFFFFF
+
+    def close(self):
+        self.data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def packets(self):
+        """Yields (data offset, captured length) for every packet record."""
+        data, record = self.data, self._record
+        offset, end = 24, len(self.data)
+        while offset + 16 <= end:
+            _, _, caplen, _ = record.unpack_from(data, offset)
+            offset += 16
+            if offset + caplen > end:
+                break  # truncated capture
+            yield offset, caplen
+            offset += caplen
+
+    def _ip_offset(self, offset, caplen):
+        """(offset of the IP header inside a packet, IP version 4 or 6), or (None, None)."""
+        data = self.data
+        if self.linktype in (LINKTYPE_RAW, LINKTYPE_IPV4, LINKTYPE_IPV6):
+            version = data[offset] >> 4 if caplen else None
+            return (offset, version) if version in (4, 6) else (None, None)
+        if self.linktype == LINKTYPE_ETHERNET:
+            pos, ethertype = 12, None
+            while pos + 2 <= caplen:
+                ethertype = (data[offset + pos] << 8) | data[offset + pos + 1]
+                if ethertype not in (0x8100, 0x88A8):  # VLAN tags
+                    break
+                pos += 4
+            version = {0x0800: 4, 0x86DD: 6}.get(ethertype)
+            return (offset + pos + 2, version) if version else (None, None)
+        if self.linktype == LINKTYPE_LINUX_SLL and caplen >= 16:
+            version = {b"\x08\x00": 4, b"\x86\xdd": 6}.get(data[offset + 14:offset + 16])
+            if version:
+                return offset + 16, version
+        return None, None
+
+    def _ipv4_tcp(self, ip, end):
+        """(TCP header offset, end of IP payload, src ip, dst ip) of an IPv4 packet, or None."""
+        data = self.data
+        if ip + 20 > end or data[ip + 9] != 6:
+            return None
+        if struct.unpack_from("!H", data, ip + 6)[0] & 0x3FFF:
+            return None  # IP fragments are not reassembled
+        total = struct.unpack_from("!H", data, ip + 2)[0]
+        ip_end = min(end, ip + total) if total else end
+        return (ip + (data[ip] & 0x0F) * 4, ip_end,
+                socket.inet_ntoa(data[ip + 12:ip + 16]), socket.inet_ntoa(data[ip + 16:ip + 20]))
+
+    def _ipv6_tcp(self, ip, end):
+        """(TCP header offset, end of IP payload, src ip, dst ip) of an IPv6 packet, or None."""
+        data = self.data
+        if ip + 40 > end:
+            return None
+        length = struct.unpack_from("!H", data, ip + 4)[0]
+        ip_end = min(end, ip + 40 + length) if length else end
+        header, pos = data[ip + 6], ip + 40
+        while header in _IPV6_EXTENSIONS and pos + 8 <= ip_end:
+            header, pos = data[pos], pos + (data[pos + 1] + 1) * 8
+        if header != 6:
+            return None  # not TCP, or a fragment (not reassembled)
+        return (pos, ip_end, socket.inet_ntop(socket.AF_INET6, data[ip + 8:ip + 24]),
+                socket.inet_ntop(socket.AF_INET6, data[ip + 24:ip + 40]))
+
+    def tcp_segments(self):
+        """Yields (src, dst, flags, seq, payload offset, payload length) for every IPv4/IPv6 TCP packet."""
+        data = self.data
+        for offset, caplen in self.packets():
+            ip, version = self._ip_offset(offset, caplen)
+            if ip is None:
+                continue
+            parsed = (self._ipv4_tcp if version == 4 else self._ipv6_tcp)(ip, offset + caplen)
+            if parsed is None:
+                continue
+            tcp, ip_end, src_ip, dst_ip = parsed
+            if tcp + 20 > ip_end:
+                continue
+            sport, dport, seq = struct.unpack_from("!HHI", data, tcp)
+            payload = tcp + (data[tcp + 12] >> 4) * 4
+            yield (src_ip, sport), (dst_ip, dport), data[tcp + 13], seq, payload, max(0, ip_end - payload)
+
+    def streams(self):
+        """Reads the capture once and returns its TCP streams, indexed by stream id."""
+        streams, current = [], {}
+        for src, dst, flags, seq, offset, length in self.tcp_segments():
+            key = (src, dst) if src <= dst else (dst, src)
+            stream = current.get(key)
+            if stream is None or (stream.closed and flags & TCP_SYN and not flags & TCP_ACK):
+                stream = TCPStream(len(streams), src, dst)
+                streams.append(stream)
+                current[key] = stream
+            stream.add(0 if src == stream.nodes[0] else 1, flags, seq, offset, length)
+        return streams
+
+    def payload(self, stream, direction=None):
+        """Reassembled bytes of one stream (both directions interleaved unless `direction` is given)."""
+        data = self.data
+        return b"".join(data[offset:offset + length] for offset, length, d in stream.segments
+                        if direction is None or d == direction)
+
+    def follow(self, stream):
+        """Text in the layout of `tshark -q -z follow,tcp,ascii,ID`."""
+        data = self.data
+        return follow_text(stream, ((data[o:o + n], d) for o, n, d in stream.segments))
+
+
+def _printable(chunk):
+    return re.sub(r"[^\x20-\x7e\n\t]", ".", chunk.decode("latin-1").replace("\r\n", "\n"))
+
+
+def follow_text(stream, chunks):
+    """Renders (bytes, direction) chunks of `stream` like tshark's follow,tcp,ascii."""
+    lines = ["", FOLLOW_RULE, "Follow: tcp,ascii", f"Filter: tcp.stream eq {stream.id}"]
+    for node, (ip, port) in enumerate(stream.nodes):
+        lines.append(f"Node {node}: [{ip}]:{port}" if ":" in ip else f"Node {node}: {ip}:{port}")
+    for chunk, direction in chunks:
+        lines.append(("\t" if direction else "") + str(len(chunk)))
+        lines.append(_printable(chunk))
+    lines.append(FOLLOW_RULE)
+    return "\n".join(lines) + "\n"
+
+
+# === Stream Index ===
+# The first scan of a capture leaves a hidden sidecar next to it (".traffic.pcap.streams.json",
+# a dotfile so the hub never lists it; in the temp directory when the folder is read-only):
+# stream id -> nodes and the (file offset, length, direction) of every payload. Follow views
+# then seek straight to those bytes instead of dissecting the whole file again. The index
+# belongs to one exact file: a different size or mtime makes it stale, and it is rebuilt.
+INDEX_VERSION = 2
+INDEX_SUFFIX = ".streams.json"
+
+
+def index_path(pcap_path):
+    pcap_path = os.path.abspath(str(pcap_path))
+    folder, name = os.path.split(pcap_path)
+    if os.access(folder, os.W_OK):
+        return os.path.join(folder, f".{name}{INDEX_SUFFIX}")
+    digest = hashlib.sha1(pcap_path.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f"{os.path.basename(pcap_path)}-{digest}{INDEX_SUFFIX}")
+
+
+def _file_stamp(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+class StreamIndex:
+    """Stream id -> packet records of one capture, valid while its size and mtime are unchanged."""
+
+    def __init__(self, pcap_path, streams, stamp):
+        self.pcap_path = str(pcap_path)
+        self.streams = streams
+        self.stamp = stamp
+
+    @classmethod
+    def build(cls, pcap_path):
+        """Full pass over the capture (and writes the sidecar)."""
+        stamp = _file_stamp(pcap_path)
+        with PcapReader(pcap_path) as reader:
+            index = cls(pcap_path, reader.streams(), stamp)
+        index.save()
+        return index
+
+    @classmethod
+    def load(cls, pcap_path):
+        """The sidecar index, or None if it is missing, unreadable or stale."""
+        try:
+            with open(index_path(pcap_path), "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("version") != INDEX_VERSION or saved.get("stamp") != _file_stamp(pcap_path):
+                return None
+            streams = []
+            for record in saved["streams"]:
+                stream = TCPStream(record["id"], *(tuple(node) for node in record["nodes"]))
+                stream.segments = [tuple(segment) for segment in record["segments"]]
+                streams.append(stream)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return cls(pcap_path, streams, saved["stamp"])
+
+    @classmethod
+    def open(cls, pcap_path):
+        return cls.load(pcap_path) or cls.build(pcap_path)
+
+    def save(self):
+        """Writes the sidecar atomically. Returns False if nowhere was writable."""
+        path = index_path(self.pcap_path)
+        record = {
+            "version": INDEX_VERSION,
+            "pcap": os.path.basename(self.pcap_path),
+            "stamp": self.stamp,
+            "streams": [{"id": s.id, "nodes": s.nodes, "segments": s.segments} for s in self.streams],
+        }
+        try:
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(record, f, separators=(",", ":"))
+            os.replace(path + ".tmp", path)
+        except OSError:
+            return False
+        return True
+
+    def is_current(self):
+        try:
+            return _file_stamp(self.pcap_path) == self.stamp
+        except OSError:
+            return False
+
+    def chunks(self, stream, direction=None):
+        """Yields (bytes, direction) for the stream's payloads, read by offset."""
+        with open(self.pcap_path, "rb") as f:
+            for offset, length, d in stream.segments:
+                if direction is None or d == direction:
+                    f.seek(offset)
+                    yield f.read(length), d
+
+    def payload(self, stream, direction=None):
+        return b"".join(chunk for chunk, _ in self.chunks(stream, direction))
+
+    def follow(self, stream_id):
+        """Text in the layout of `tshark -q -z follow,tcp,ascii,ID`."""
+        stream = self.streams[stream_id]
+        return follow_text(stream, self.chunks(stream))
+
+
+def scan_pcap(path, pattern):
+    """
+    One read of the capture: returns (streams, {stream_id: set of matches}) where `pattern`
+    (a str regex) is searched in each direction of every reassembled stream. A current
+    sidecar index skips the header parsing; otherwise one is written for later lookups.
+    """
+    regex = re.compile(pattern.pattern.encode() if hasattr(pattern, "pattern") else pattern.encode())
+    matches = {}
+
+    def search(stream, data):
+        for match in regex.finditer(data):
+            matches.setdefault(stream.id, set()).add(match.group(0).decode("ascii", "replace"))
+
+    index = StreamIndex.load(path)
+    if index is not None:
+        for stream in index.streams:
+            for direction in (0, 1):
+                search(stream, index.payload(stream, direction))
+        return index.streams, matches
+
+    stamp = _file_stamp(path)
+    with PcapReader(path) as reader:
+        streams = reader.streams()
+        for stream in streams:
+            for direction in (0, 1):
+                search(stream, reader.payload(stream, direction))
+    StreamIndex(path, streams, stamp).save()
+    return streams, matches
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python3 pcap_core.py [PCAP_FILE] [STREAM_ID]")
+        sys.exit(1)
+    index = StreamIndex.open(sys.argv[1])
+    if len(sys.argv) > 2:
+        print(index.follow(int(sys.argv[2])), end="")
+    else:
+        for s in index.streams:
+            (a, ap), (b, bp) = s.nodes
+            print(f"{s.id:>5}  {a}:{ap} <-> {b}:{bp}  {sum(seg[1] for seg in s.segments):>8} bytes")
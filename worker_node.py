@@ -1,24 +1,322 @@
 #!/usr/bin/env python3
-import socket
 import subprocess
 import os
 import sys
 import time
+import pty
+import codecs
+import fcntl
+import struct
+import termios
+import threading
+import selectors
+
+from coach_protocol import send_message, recv_message, connect_endpoint
+
+STREAM_CHUNK = 4096          # bytes read per pipe/pty wake-up
+CAPTURE_LIMIT = 64 * 1024    # most output kept for a "capture" reply (the tail wins)
+DRAIN_SECONDS = 0.2          # output still collected after the command exits
+
+class LockedSocket:
+    """Coach socket whose sendall is atomic across threads (heartbeats vs. command replies)."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self._lock = threading.Lock()
+
+    def sendall(self, data):
+        with self._lock:
+            self.sock.sendall(data)
+
+    def __getattr__(self, name):
+        return getattr(self.sock, name)
+
+def start_heartbeat(s, interval):
+    """Sends a heartbeat frame every `interval` seconds, even while a command is running."""
+    def beat():
+        while True:
+            time.sleep(interval)
+            try:
+                send_message(s, {"type": "heartbeat"})
+            except OSError:
+                return
+    threading.Thread(target=beat, name="heartbeat", daemon=True).start()
+
+class TypingRenderer:
+    """
+    Shows a command being "typed" at the worker prompt.
+
+    Modes:
+      instant   -> the whole command at once (one write, one flush)
+      chunked   -> word by word
+      animated  -> character animation, grouped into ~60 fps frames
+    chunked/animated never spend more than `budget_ms` on one command, however long it is.
+    """
+
+    MODES = ("instant", "chunked", "animated")
+    FRAME_MS = 16
+
+    def __init__(self, mode="animated", budget_ms=300, char_delay_ms=10):
+        self.mode = mode if mode in self.MODES else "animated"
+        self.budget = max(0, budget_ms) / 1000.0
+        self.char_delay = max(0, char_delay_ms) / 1000.0
+
+    @classmethod
+    def from_options(cls, options):
+        mode = options.get("typing", os.environ.get("CCRI_TYPING", "animated"))
+        budget = options.get("typing-budget", os.environ.get("CCRI_TYPING_BUDGET_MS", "300"))
+        try:
+            budget = int(budget)
+        except ValueError:
+            budget = 300
+        return cls(mode=mode, budget_ms=budget)
+
+    def render(self, text):
+        total = min(len(text) * self.char_delay, self.budget)
+        if self.mode == "instant" or total <= 0 or not text:
+            pieces = [text]
+        elif self.mode == "chunked":
+            words = text.split(" ")
+            pieces = [w + " " for w in words[:-1]] + [words[-1]]
+        else:
+            frames = max(1, min(len(text), int(total * 1000 / self.FRAME_MS)))
+            step = -(-len(text) // frames)  # ceil division
+            pieces = [text[i:i + step] for i in range(0, len(text), step)]
+
+        delay = total / len(pieces) if len(pieces) > 1 else 0
+        for piece in pieces:
+            sys.stdout.write(piece)
+            sys.stdout.flush()
+            if delay:
+                time.sleep(delay)
+        sys.stdout.write("\n")
+        sys.stdout.flush()
+
+class OutputForwarder:
+    """Echoes command output to this terminal and streams it to the coach chunk by chunk."""
+
+    def __init__(self, s, request_id, stream=True, capture=False):
+        self.s = s
+        self.request_id = request_id
+        self.stream = stream
+        self.capture = capture
+        self.captured = ""
+        self.decoders = {}
+
+    def feed(self, name, chunk):
+        local = sys.stderr.buffer if name == "stderr" else sys.stdout.buffer
+        local.write(chunk)
+        local.flush()
+
+        if name not in self.decoders:
+            self.decoders[name] = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        text = self.decoders[name].decode(chunk).replace("\r\n", "\n")
+        if not text:
+            return
+        if self.stream:
+            send_message(self.s, {"type": "output", "id": self.request_id, "stream": name, "data": text})
+        if self.capture:
+            self.captured = (self.captured + text)[-CAPTURE_LIMIT:]
+
+    def result(self):
+        return self.captured if self.capture else None
+
+def _stdin_fd():
+    """This terminal's stdin, if it is interactive (so keystrokes can be forwarded)."""
+    try:
+        return 0 if os.isatty(0) else None
+    except OSError:
+        return None
+
+def _copy_winsize(fd):
+    """Gives the pty `fd` this terminal's window size; a 0x0 pty breaks full-screen tools (nano)."""
+    for source in (1, 0, 2):
+        try:
+            size = fcntl.ioctl(source, termios.TIOCGWINSZ, b"\0" * 8)
+        except OSError:
+            continue
+        if struct.unpack("HHHH", size)[:2] != (0, 0):
+            fcntl.ioctl(fd, termios.TIOCSWINSZ, size)
+            return
+
+def run_streaming(s, request_id, cmd, stream=True, capture=False):
+    """
+    Runs `cmd` in a shell, echoing its output to this terminal and, if `stream` is set,
+    forwarding each chunk to the coach as it arrives. stdout goes through a pty so tools
+    keep their terminal formatting; stderr uses a pipe so the two stay distinguishable.
+    Returns (exit_code, captured_output_or_None). Nothing is buffered beyond CAPTURE_LIMIT.
+    """
+    master, slave = pty.openpty()
+    _copy_winsize(slave)
+    try:
+        proc = subprocess.Popen(cmd, shell=True, stdout=slave, stderr=subprocess.PIPE)
+    finally:
+        os.close(slave)
+
+    names = {master: "stdout", proc.stderr.fileno(): "stderr"}
+    forwarder = OutputForwarder(s, request_id, stream=stream, capture=capture)
+
+    sel = selectors.DefaultSelector()
+    for fd in names:
+        sel.register(fd, selectors.EVENT_READ)
+
+    # Background children (`xdg-open`, `sleep 4 &`) inherit the pty and the stderr pipe, so
+    # EOF can be far away: the command is over when the shell exits, plus a short drain
+    deadline = None
+    while sel.get_map():
+        timeout = 0.1 if deadline is None else max(0.0, deadline - time.monotonic())
+        for key, _ in sel.select(timeout):
+            try:
+                chunk = os.read(key.fd, STREAM_CHUNK)
+            except OSError:
+                chunk = b""  # EIO: every writer of the pty has exited
+            if not chunk:
+                sel.unregister(key.fd)
+                continue
+            forwarder.feed(names[key.fd], chunk)
+        if deadline is None:
+            if proc.poll() is not None:
+                deadline = time.monotonic() + DRAIN_SECONDS
+        elif time.monotonic() >= deadline:
+            break
+
+    sel.close()
+    os.close(master)
+    proc.stderr.close()
+    return proc.wait(), forwarder.result()
+
+class PersistentShell:
+    """
+    One long-lived bash on a pty. Commands are written to it one at a time; when one
+    finishes, bash's PROMPT_COMMAND prints a sentinel line carrying the exit status and
+    $PWD. Only the command itself goes to the pty, so a command that reads stdin gets
+    what the student types, never the sentinel. cd, export, aliases and variables
+    persist between steps, and fork/exec of the shell is paid once per session.
+    """
+
+    MARK = b"\x1eCCRI-DONE:"
+
+    def __init__(self):
+        self.master, slave = pty.openpty()
+        _copy_winsize(slave)
+        self.proc = subprocess.Popen(
+            ["bash", "--noprofile", "--norc", "--noediting", "-i"],
+            stdin=slave, stdout=slave, stderr=slave,
+            start_new_session=True,
+            # Make the pty bash's controlling terminal so job control and /dev/tty work
+            preexec_fn=lambda: fcntl.ioctl(0, termios.TIOCSCTTY, 0),
+        )
+        os.close(slave)
+        self.cwd = os.getcwd()
+        # Quiet the shell (no echo of what we type, no prompts) and let every prompt
+        # announce that the previous command is done
+        self._write("stty -echo; PS1=''; PS2=''; shopt -s expand_aliases; "
+                    "PROMPT_COMMAND='printf \"\\n\\036CCRI-DONE:%s:%s\\036\\n\" \"$?\" \"$PWD\"'")
+        self._wait(OutputForwarder(None, None, stream=False), echo_output=False)
+
+    def _write(self, line):
+        os.write(self.master, (line + "\n").encode("utf-8"))
+
+    def run(self, cmd, forwarder):
+        """Runs `cmd` (one line) in the shell, feeding output to `forwarder`. Returns the exit code."""
+        self._write(cmd)
+        return self._wait(forwarder)
+
+    def _wait(self, forwarder, echo_output=True):
+        """Reads output until the next sentinel; returns the exit code it carries."""
+        stdin_fd = _stdin_fd()
+        sel = selectors.DefaultSelector()
+        sel.register(self.master, selectors.EVENT_READ)
+        if stdin_fd is not None:
+            sel.register(stdin_fd, selectors.EVENT_READ)
+
+        pending = b""
+        exit_code = 1
+        try:
+            while True:
+                for key, _ in sel.select():
+                    if key.fd == stdin_fd:
+                        # Forward what the student types to the running command
+                        data = os.read(stdin_fd, STREAM_CHUNK)
+                        if data:
+                            os.write(self.master, data)
+                        continue
+                    try:
+                        chunk = os.read(self.master, STREAM_CHUNK)
+                    except OSError:
+                        chunk = b""
+                    if not chunk:
+                        raise RuntimeError("The persistent shell exited.")
+                    pending += chunk
+
+                    idx = pending.find(self.MARK)
+                    if idx >= 0:
+                        end = pending.find(b"\x1e", idx + len(self.MARK))
+                        if end < 0:
+                            continue  # sentinel not complete yet
+                        before = pending[:idx]
+                        # The sentinel starts with a newline to keep it on its own line
+                        if before.endswith(b"\r\n"):
+                            before = before[:-2]
+                        elif before.endswith(b"\n"):
+                            before = before[:-1]
+                        if before and echo_output:
+                            forwarder.feed("stdout", before)
+                        fields = pending[idx + len(self.MARK):end].decode("utf-8", "replace").split(":", 1)
+                        exit_code = int(fields[0]) if fields[0].isdigit() else 1
+                        self.cwd = fields[1] if len(fields) > 1 else self.cwd
+                        return exit_code
+
+                    # Flush everything that cannot be the start of a sentinel
+                    keep = len(self.MARK) + 8
+                    if len(pending) > keep:
+                        flush, pending = pending[:-keep], pending[-keep:]
+                        cut = flush.rfind(b"\x1e")
+                        if cut >= 0:
+                            pending = flush[cut:] + pending
+                            flush = flush[:cut]
+                        if flush and echo_output:
+                            forwarder.feed("stdout", flush)
+        finally:
+            sel.close()
+
+    def close(self):
+        try:
+            self._write("exit")
+            self.proc.wait(timeout=2)
+        except Exception:
+            self.proc.kill()
+        os.close(self.master)
 
 def main():
     if len(sys.argv) < 2:
         return 
 
-    host = '127.0.0.1'
-    port = int(sys.argv[1])
+    # Optional flags after the address: --shell=persistent --typing=instant --typing-budget=200
+    # --heartbeat=SECONDS (liveness frames for the coach) --cwd=PATH (resume a respawned session)
+    options = dict(arg[2:].split("=", 1) for arg in sys.argv[2:] if arg.startswith("--") and "=" in arg)
+    shell_mode = options.get("shell", os.environ.get("CCRI_WORKER_SHELL", "fresh"))
+    typer = TypingRenderer.from_options(options)
+    heartbeat = float(options.get("heartbeat", 0) or 0)
+    if options.get("cwd"):
+        try:
+            os.chdir(options["cwd"])
+        except OSError:
+            pass
 
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    # Coach address: unix:@name, tcp:host:port, fd:N or a bare port (see coach_protocol)
     try:
-        time.sleep(1) 
-        s.connect((host, port))
-    except:
+        s = LockedSocket(connect_endpoint(sys.argv[1]))
+    except (OSError, ValueError):
         return
 
+    shell = PersistentShell() if shell_mode == "persistent" else None
+
+    # Readiness signal: the coach waits for this before sending commands
+    send_message(s, {"type": "hello", "pid": os.getpid(), "cwd": os.getcwd(), "heartbeat": heartbeat})
+    if heartbeat > 0:
+        start_heartbeat(s, heartbeat)
+
     # Info for the prompt
     user = os.getenv('USER', 'student')
     
@@ -34,22 +332,29 @@ def main():
             display_cwd = cwd
 
         # Receive Command
-        data = s.recv(4096).decode('utf-8')
-        if not data or data == "EXIT":
+        msg = recv_message(s)
+        if msg is None or msg.get("type") == "exit":
             print("\n👋 Session ended.")
             break
+        if msg.get("type") != "run":
+            continue
+
+        request_id = msg.get("id")
+        data = msg.get("cmd", "")
+        capture = msg.get("capture", False)
+        stream = msg.get("stream", False)
 
         # === SILENT COMMAND HANDLER ===
-        # If the command starts with SILENT:, we run it but DO NOT show it.
-        if data.startswith("SILENT:"):
-            silent_cmd = data[7:] # Strip prefix
+        # Silent commands run but are NOT shown.
+        if msg.get("silent"):
+            exit_code = 1
             try:
                 # Run purely in background
-                subprocess.run(silent_cmd, shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                exit_code = subprocess.run(data, shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode
             except:
                 pass
-            # Always send DONE so coach knows we finished the cleanup
-            s.sendall(b"DONE")
+            # Always answer so coach knows we finished the cleanup
+            send_message(s, {"type": "done", "id": request_id, "exit_code": exit_code, "output": None, "cwd": os.getcwd()})
             continue
         # ==============================
 
@@ -58,32 +363,48 @@ def main():
         print(prompt, end="", flush=True)
 
         # Typing effect
-        for char in data:
-            sys.stdout.write(char)
-            sys.stdout.flush()
-            time.sleep(0.01) 
-        print() 
+        typer.render(data)
+
+        # Persistent shell: bash keeps its own state (cd, export, aliases)
+        if shell:
+            forwarder = OutputForwarder(s, request_id, stream=stream, capture=capture)
+            exit_code = 1
+            try:
+                exit_code = shell.run(data, forwarder)
+                os.chdir(shell.cwd)  # keep prompt and silent commands in step with the shell
+            except Exception as e:
+                print(f"❌ Error: {e}")
+            send_message(s, {"type": "done", "id": request_id, "exit_code": exit_code,
+                             "output": forwarder.result(), "cwd": os.getcwd()})
+            continue
 
         # 'cd' Handler
         if data.strip().startswith("cd "):
             path = data.strip()[3:].strip()
+            exit_code = 0
             try:
                 os.chdir(path)
             except FileNotFoundError:
                 print(f"❌ bash: cd: {path}: No such file or directory")
+                exit_code = 1
             except Exception as e:
                 print(f"❌ cd error: {e}")
-            s.sendall(b"DONE")
+                exit_code = 1
+            send_message(s, {"type": "done", "id": request_id, "exit_code": exit_code, "output": None, "cwd": os.getcwd()})
             continue
 
-        # Execute standard commands
+        # Execute standard commands, streaming output back as it happens
+        exit_code = 1
+        output = None
         try:
-            subprocess.run(data, shell=True)
+            exit_code, output = run_streaming(s, request_id, data, stream=stream, capture=capture)
         except Exception as e:
             print(f"❌ Error: {e}")
-        
-        s.sendall(b"DONE")
 
+        send_message(s, {"type": "done", "id": request_id, "exit_code": exit_code, "output": output, "cwd": os.getcwd()})
+
+    if shell:
+        shell.close()
     s.close()
 
 if __name__ == "__main__":